@@ -0,0 +1,112 @@
+from imports import *
+import plotly.express as px
+from dataset import get_prepared
+from instrument import stage, chart
+from figures import cached_figure
+
+# measure column -> (label, formatter)
+KPIS = {
+    "events": ("Events", lambda v: f"{v:,.0f}"),
+    "deaths": ("Deaths", lambda v: f"{v:,.0f}"),
+    "economic_impact_million_usd": ("Economic impact", lambda v: f"${v / 1000:,.1f}B"),
+    "international_aid_million_usd": ("International aid", lambda v: f"${v:,.0f}M"),
+}
+TOP_N = 10
+
+
+def show_overview():
+    with stage("load") as rec:
+        ds = get_prepared()
+        # Materialized with the dataset (see get_prepared): this is a lookup
+        cube = ds.rollup()
+        rec["rows_out"] = len(cube.table)
+
+    with stage("aggregate", rows_in=len(cube.table)) as rec:
+        per_year = cube.totals("year")
+        rec["rows_out"] = len(per_year)
+
+    st.title("🌍 Climate Events Dashboard")
+
+    if per_year.empty:
+        st.warning("No events loaded.")
+        return
+
+    years = per_year.index.to_list()
+    st.caption(f"Key figures {years[0]}–{years[-1]} · last year vs the one before")
+
+    # -----------------------
+    # KPIs (whole period, delta = last year vs previous year)
+    # -----------------------
+    for col, (key, (label, fmt)) in zip(st.columns(len(KPIS)), KPIS.items()):
+        with col:
+            delta = None
+            if len(years) > 1 and per_year[key].iloc[-2]:
+                delta = f"{per_year[key].iloc[-1] / per_year[key].iloc[-2] - 1:+.1%} in {years[-1]}"
+            # more events / deaths / damage is bad news, more aid isn't
+            color = "normal" if key == "international_aid_million_usd" else "inverse"
+            st.metric(label, fmt(per_year[key].sum()), delta, delta_color=color)
+
+    # -----------------------
+    # Per year
+    # -----------------------
+    st.subheader("Per year")
+    st.dataframe(
+        per_year[list(KPIS)].rename(columns={k: label for k, (label, _) in KPIS.items()}),
+        column_config={
+            "Events": st.column_config.NumberColumn(format="%d"),
+            "Deaths": st.column_config.NumberColumn(format="%d"),
+            "Economic impact": st.column_config.NumberColumn("Economic impact (M USD)", format="%.1f"),
+            "International aid": st.column_config.NumberColumn("International aid (M USD)", format="%.1f"),
+        },
+        use_container_width=True,
+    )
+
+    # -----------------------
+    # Top countries
+    # -----------------------
+    st.subheader(f"Top {TOP_N} countries")
+    rank_by = st.radio(
+        "Rank by",
+        list(KPIS),
+        format_func=lambda k: KPIS[k][0],
+        horizontal=True,
+        key="overview_rank_by",
+    )
+
+    with stage("figure") as rec:
+        top = cube.totals("country")[rank_by].nlargest(TOP_N).iloc[::-1]
+        rec["rows_out"] = len(top)
+
+        def _build():
+            fig = px.bar(
+                x=top.to_numpy(),
+                y=top.index.astype(str),
+                orientation="h",
+                labels={"x": KPIS[rank_by][0], "y": ""},
+            )
+            fig.update_layout(height=40 * len(top) + 120, margin=dict(l=10, r=10, t=10, b=10))
+            return fig
+
+        fig = cached_figure(_build, "overview_top", top)
+
+    chart(fig, use_container_width=True)
+
+    st.markdown(
+        """
+        This dashboard explores global climate events using three analytical tasks:
+
+        ### 🕒 Task 1 — Temporal Patterns
+        Explore how the **frequency and composition** of climate events change
+        over time (yearly / monthly).
+
+        ### 💥 Task 2 — Severity vs Economic Impact
+        Analyze the **relationship between event severity and economic damage**,
+        identify trends and outliers.
+
+        ### 🗺️ Task 3 — World Map
+        Examine the **spatial distribution** of events worldwide, with filters
+        for time, event type, severity and impact.
+
+        👉 Use the **sidebar on the left** to navigate between tasks.
+        """
+    )
@@ -1,7 +1,19 @@
-from imports import *  # assumes: st, pd, np, px, calendar, load_gc
+from imports import *  # assumes: st, pd, np, calendar
+import plotly.express as px
+from dataset import get_prepared
+from aggregates import CountCube, category_index
+import duckdb_backend
+from instrument import stage, chart
+from figures import cached_figure
 
 def show_temporal():
-    gc = load_gc()
+    with stage("load") as rec:
+        ds = get_prepared()
+        # year x month x event_type counts, built once per data version
+        cube = ds.aggregate(
+            "temporal_cube", CountCube.from_frame, CountCube.merge, duckdb_backend.count_cube, CountCube.COLUMNS
+        )
+        rec["rows_out"] = len(ds.frame)
 
     st.title("🌪️ Temporal Patterns (2020–2024)")
     st.caption("Comparison mode: grouped bars (side-by-side) with Event types / Categories + Random 4.")
@@ -27,7 +39,7 @@ def show_temporal():
         return str(s).strip().lower().replace("_", " ")
 
     # All event types in data (raw)
-    all_event_types_raw = sorted(gc["event_type"].dropna().astype(str).unique().tolist())
+    all_event_types_raw = list(cube.event_types)
     # Normalized lookup: norm -> original
     norm_to_raw = { _norm(x): x for x in all_event_types_raw }
 
@@ -189,16 +201,16 @@ def show_temporal():
             st.warning("Pick at least one category.")
             st.stop()
 
-        # Convert categories -> list of event types
-        chosen_event_types_raw = []
-        cat_for_event = {}
-        for label in selected_categories:
-            cat = label_to_category[label]
-            for e in category_to_existing_raw.get(cat, []):
-                chosen_event_types_raw.append(e)
-                cat_for_event[e] = cat
-
-        chosen_event_types_raw = sorted(list(set(chosen_event_types_raw)))
+        # Convert categories -> list of event types (via the precomputed type -> category index)
+        cat_of_type = ds.aggregate(
+            "temporal_category_index",
+            lambda _: category_index(cube.event_types, CATEGORY_MAP, _norm),
+        )
+        category_names = list(CATEGORY_MAP)
+        chosen_cat_idx = np.array(sorted(category_names.index(label_to_category[l]) for l in selected_categories))
+        chosen_event_types_raw = [
+            e for e, c in zip(cube.event_types, cat_of_type) if c in chosen_cat_idx
+        ]
 
         if len(chosen_event_types_raw) == 0:
             st.warning("Selected categories contain no matching events in the dataset.")
@@ -210,7 +222,7 @@ def show_temporal():
     st.write("")
 
     # ====== 5) For Month mode, pick a year (to avoid mixing years) ======
-    years_all = sorted(gc["year"].dropna().astype(int).unique().tolist())
+    years_all = [int(y) for y in cube.years if cube.counts[cube.year_index[int(y)]].any()]
     chosen_year_for_month = None
 
     if time_unit == "Month":
@@ -221,70 +233,54 @@ def show_temporal():
             key="cmp_month_year"
         )
 
-    # ====== 6) Prepare filtered data ======
-    df = gc.copy()
-
-    df["year"] = pd.to_numeric(df["year"], errors="coerce")
-    df["month"] = pd.to_numeric(df["month"], errors="coerce")
-    df = df.dropna(subset=["year", "month", "event_type"]).copy()
-    df["year"] = df["year"].astype(int)
-    df["month"] = df["month"].astype(int)
-
-    # Filter by chosen event types
-    df = df[df["event_type"].isin(chosen_event_types_raw)].copy()
-
-    # Define time axis
-    if time_unit == "Year":
-        x_col = "year"
-        x_order = sorted(df["year"].unique().tolist())
-        x_labels = [str(x) for x in x_order]
-    else:
-        df = df[df["year"] == int(chosen_year_for_month)].copy()
-        x_col = "month"
-        x_order = list(range(1, 13))
-        x_labels = [calendar.month_abbr[m] for m in x_order]
-
-    # ====== 7) Aggregate to pivot ======
-    if pick_by == "Event types":
-        counts = (
-            df.groupby([x_col, "event_type"])
-              .size()
-              .reset_index(name="count")
-        )
-        pivot = counts.pivot(index=x_col, columns="event_type", values="count").fillna(0)
-        pivot = pivot.reindex(x_order, fill_value=0)
-
-        if normalize:
-            row_sums = pivot.sum(axis=1).replace(0, np.nan)
-            pivot = (pivot.div(row_sums, axis=0) * 100).fillna(0)
-
-        # Rename columns for legend
-        pivot = pivot.rename(columns=legend_map)
+    # ====== 6) Slice the count cube ======
+    with stage("aggregate", rows_in=int(cube.counts.sum())) as rec:
+        type_idx = np.array([cube.type_index[e] for e in chosen_event_types_raw])
+
+        # Define time axis
+        if time_unit == "Year":
+            x_col = "year"
+            counts = cube.by_year(type_idx)
+            has_events = counts.sum(axis=1) > 0
+            counts = counts[has_events]
+            x_order = [int(y) for y in cube.years[has_events]]
+            x_labels = [str(x) for x in x_order]
+        else:
+            x_col = "month"
+            counts = cube.by_month(chosen_year_for_month, type_idx)
+            x_order = list(range(1, 13))
+            x_labels = [calendar.month_abbr[m] for m in x_order]
 
-    else:
-        # Category mode: sum counts of events within each category
-        df["category"] = df["event_type"].map(cat_for_event)
+        # ====== 7) Aggregate to pivot ======
+        if pick_by == "Event types":
+            series = list(chosen_event_types_raw)
+        else:
+            # Category mode: sum counts of events within each category (one-hot matmul)
+            one_hot = cat_of_type[type_idx][:, None] == chosen_cat_idx[None, :]
+            counts = counts @ one_hot.astype(counts.dtype)
+            series = [category_names[c] for c in chosen_cat_idx]
 
-        counts = (
-            df.groupby([x_col, "category"])
-              .size()
-              .reset_index(name="count")
-        )
-        pivot = counts.pivot(index=x_col, columns="category", values="count").fillna(0)
-        pivot = pivot.reindex(x_order, fill_value=0)
+        pivot = pd.DataFrame(counts, index=pd.Index(x_order, name=x_col), columns=series)
+        # Only series that actually occur in the period, alphabetical (like a groupby pivot)
+        pivot = pivot.loc[:, pivot.sum(axis=0) > 0].sort_index(axis=1)
 
         if normalize:
             row_sums = pivot.sum(axis=1).replace(0, np.nan)
             pivot = (pivot.div(row_sums, axis=0) * 100).fillna(0)
 
-        # Make category labels nicer
-        pivot.columns = [str(c).title() for c in pivot.columns]
+        if pick_by == "Event types":
+            # Rename columns for legend
+            pivot = pivot.rename(columns=legend_map)
+        else:
+            # Make category labels nicer
+            pivot.columns = [str(c).title() for c in pivot.columns]
 
-    # Convert pivot to long format for Plotly grouped bars
-    plot_df = pivot.reset_index().melt(id_vars=[x_col], var_name="Series", value_name="Value")
+        # Convert pivot to long format for Plotly grouped bars
+        plot_df = pivot.reset_index().melt(id_vars=[x_col], var_name="Series", value_name="Value")
 
-    # Ensure x is categorical to preserve order
-    plot_df[x_col] = pd.Categorical(plot_df[x_col], categories=x_order, ordered=True)
+        # Ensure x is categorical to preserve order
+        plot_df[x_col] = pd.Categorical(plot_df[x_col], categories=x_order, ordered=True)
+        rec["rows_out"] = len(plot_df)
 
     # ====== 8) Plotly grouped bar chart ======
     y_title = "Percent (%)" if normalize else "Count"
@@ -295,53 +291,60 @@ def show_temporal():
         title = "Grouped comparison by year" + (" (normalized)" if normalize else "")
         x_title = "Year"
 
-    fig = px.bar(
-        plot_df,
-        x=x_col,
-        y="Value",
-        color="Series",
-        barmode="group",
-        labels={x_col: x_title, "Value": y_title, "Series": "Event Type" if pick_by == "Event types" else "Category"},
-        title=title,
-    )
-
-    fig.update_layout(
-        template="plotly_dark",
-        height=520,
-        title=dict(text=title, x=0, xanchor="left", y=0.97, yanchor="top", font=dict(size=22)),
-        font=dict(size=16),
-
-        legend=dict(
-            orientation="v",
-            yanchor="top",
-            y=1,
-            xanchor="left",
-            x=1.02,
-            title_text="Event Type",
-            bgcolor="rgba(0,0,0,0)",
-        ),
-
-        margin=dict(l=20, r=160, t=80, b=40),
-    )
-
-    # Fix tick labels (years as 2022, not 2,022)
-    if time_unit == "Year":
-        fig.update_xaxes(
-            tickmode="array",
-            tickvals=x_order,
-            ticktext=[str(y) for y in x_order],
+    def _build():
+        fig = px.bar(
+            plot_df,
+            x=x_col,
+            y="Value",
+            color="Series",
+            barmode="group",
+            labels={x_col: x_title, "Value": y_title, "Series": "Event Type" if pick_by == "Event types" else "Category"},
+            title=title,
         )
-    else:
-        fig.update_xaxes(
-            tickmode="array",
-            tickvals=x_order,
-            ticktext=x_labels,
+
+        fig.update_layout(
+            template="plotly_dark",
+            height=520,
+            title=dict(text=title, x=0, xanchor="left", y=0.97, yanchor="top", font=dict(size=22)),
+            font=dict(size=16),
+
+            legend=dict(
+                orientation="v",
+                yanchor="top",
+                y=1,
+                xanchor="left",
+                x=1.02,
+                title_text="Event Type",
+                bgcolor="rgba(0,0,0,0)",
+            ),
+
+            margin=dict(l=20, r=160, t=80, b=40),
         )
 
-    fig.update_yaxes(title_font=dict(size=18), tickfont=dict(size=14))
-    fig.update_xaxes(title_font=dict(size=18), tickfont=dict(size=14))
+        # Fix tick labels (years as 2022, not 2,022)
+        if time_unit == "Year":
+            fig.update_xaxes(
+                tickmode="array",
+                tickvals=x_order,
+                ticktext=[str(y) for y in x_order],
+            )
+        else:
+            fig.update_xaxes(
+                tickmode="array",
+                tickvals=x_order,
+                ticktext=x_labels,
+            )
+
+        fig.update_yaxes(title_font=dict(size=18), tickfont=dict(size=14))
+        fig.update_xaxes(title_font=dict(size=18), tickfont=dict(size=14))
+
+        return fig
+
+    # Same pivot + same styling -> the figure comes from the shared figure cache
+    with stage("figure"):
+        fig = cached_figure(_build, "temporal", plot_df, x_col, x_order, x_labels, x_title, y_title, title, pick_by)
 
-    st.plotly_chart(fig, use_container_width=True)
+    chart(fig, use_container_width=True)
 
     # Small hint
     st.caption("Tip: switch to Categories to reduce clutter; use Normalize (%) to compare composition instead of raw volume.")
\ No newline at end of file
@@ -1,106 +1,259 @@
 from imports import *
+import plotly.graph_objects as go
+from dataset import clean_event_label, get_prepared
+from aggregates import SeverityHistogram, SeveritySummary
+import duckdb_backend
+import streaming
+from sketches import SKETCH_ERROR, SketchCube
+from analysis import IQR_K, ROBUST_Z, TrendSums, find_outliers
+from instrument import stage, chart
+from figures import cached_figure
+
+TREND_BY = {"event_type": "Event type", "year": "Year"}
+OUTLIER_METHODS = {"robust_z": "Robust z-score", "iqr": "IQR fences"}
+# Most extreme outliers drawn on the violin / listed in the table
+MAX_HIGHLIGHT = 300
+MAX_TABLE_ROWS = 500
+
 
 def show_severity():
     st.subheader("Distribution: Economic Impact by Severity (Violin + Box)")
 
     # -----------------------
-    # 1) Prepare data
+    # 1) Summaries (per data version, computed server-side)
     # -----------------------
-    dfv = load_gc()
-
-    # Keep only needed columns (optional but clean)
-    needed_cols = ["severity", "economic_impact_million_usd", "year", "country", "event_type"]
-    existing = [c for c in needed_cols if c in dfv.columns]
-    dfv = dfv[existing].copy()
-
-    # Severity -> integer categories (1..10)
-    dfv["severity_int"] = pd.to_numeric(dfv["severity"], errors="coerce").astype("Int64")
-
-    # Economic impact -> numeric, positive only (for log10)
-    dfv["economic_impact_million_usd"] = pd.to_numeric(dfv["economic_impact_million_usd"], errors="coerce")
-    dfv = dfv.dropna(subset=["severity_int", "economic_impact_million_usd"])
-    dfv = dfv[dfv["economic_impact_million_usd"] > 0].copy()
-
-    # log10 transform
-    dfv["log10_impact"] = np.log10(dfv["economic_impact_million_usd"])
-
-    # X axis as ordered categories (string labels, but ordered)
-    severity_order = sorted(dfv["severity_int"].dropna().unique().tolist())
-    dfv["severity_cat"] = dfv["severity_int"].astype(int).astype(str)
-
-    # Optional: clean event type for hover
-    if "event_type" in dfv.columns:
-        dfv["event_type_clean"] = (
-            dfv["event_type"].astype(str)
-            .str.replace("_", " ", regex=False)
-            .str.title()
+    # Quantiles + KDE per severity instead of shipping every row to the browser
+    with stage("load") as rec:
+        ds = get_prepared()
+        # Per (severity, year, event type) quantile sketches: any narrowing is a merge of cells
+        sketches = ds.aggregate(
+            "severity_sketches", SketchCube.from_frame, SketchCube.merge, columns=SketchCube.COLUMNS
         )
-    else:
-        dfv["event_type_clean"] = "Unknown"
+        rec["rows_out"] = len(sketches.cells)
+
+    col_years, col_types = st.columns(2)
+    with col_years:
+        years = st.multiselect("Years", sketches.years(), key="severity_years", placeholder="All years")
+    with col_types:
+        event_types = st.multiselect(
+            "Event types", sketches.event_types(), format_func=clean_event_label,
+            key="severity_event_types", placeholder="All event types",
+        )
+
+    with stage("aggregate") as rec:
+        if years or event_types:
+            summary = SeveritySummary.from_sketches(
+                sketches.by_severity(years or None, event_types or None)
+            )
+            st.caption(f"Approximate quartiles (rank error ≤ {SKETCH_ERROR:.1%}) from merged sketches.")
+        elif streaming.enabled():
+            # Streamed per-severity histograms: bounded, whatever the archive size
+            hist = ds.aggregate(
+                "severity_histogram", SeverityHistogram.from_frame, SeverityHistogram.merge,
+                columns=SeverityHistogram.COLUMNS,
+            )
+            summary = ds.aggregate("severity_summary:histogram", lambda _: SeveritySummary.from_histogram(hist))
+        else:
+            # The SQL summary keeps no rows to merge appends into: it is queried again per data version
+            summary = ds.aggregate(
+                "severity_summary", SeveritySummary.from_frame,
+                None if duckdb_backend.enabled() else SeveritySummary.merge,
+                duckdb_backend.severity_summary, SeveritySummary.COLUMNS,
+            )
+        stats = summary.stats
+        rec["rows_out"] = int(stats["n"].sum()) if len(stats) else 0
+
+    if stats.empty:
+        st.warning("No events with a positive economic impact.")
+        return
+
+    severity_order = [str(int(s)) for s in summary.severities]
+
+    col_trend, col_method, col_show = st.columns(3)
+    with col_trend:
+        trend_by = st.radio(
+            "Trend by", ["event_type", "year"], format_func=lambda b: TREND_BY[b],
+            horizontal=True, key="severity_trend_by",
+        )
+    with col_method:
+        method = st.radio(
+            "Outliers by", list(OUTLIER_METHODS), format_func=OUTLIER_METHODS.get,
+            horizontal=True, key="severity_outlier_method",
+        )
+    with col_show:
+        highlight = st.checkbox("Highlight outliers", value=True, key="severity_highlight")
 
     # -----------------------
-    # 2) Build violin figure
+    # Trends + outliers (per data version; a rerun only filters the results)
     # -----------------------
-    fig_v = px.violin(
-        dfv,
-        x="severity_cat",
-        y="log10_impact",
-        box=True,
-        points=False,
-        category_orders={"severity_cat": [str(s) for s in severity_order]},
-        labels={
-            "severity_cat": "Severity",
-            "log10_impact": "log10(Economic Impact in Million USD)"
-        },
-        title="Economic Impact Distribution by Severity (Violin + Box, log10 scale)",
-        # Hover: only show what you want
-        hover_data={
-            "severity_cat": False,     # already on axis
-            "log10_impact": False,     # we'll control via hovertemplate
-            "severity_int": True,
-            "economic_impact_million_usd": ":.2f",
-            "year": True if "year" in dfv.columns else False,
-            "country": True if "country" in dfv.columns else False,
-            "event_type_clean": True,
-        },
-    )
+    with stage("analysis") as rec:
+        sums = ds.aggregate("severity_trends", TrendSums.from_frame, TrendSums.merge, columns=TrendSums.COLUMNS)
+        type_fit = sums.fit("event_type")
+        outliers = ds.aggregate(
+            f"severity_outliers:{method}", lambda f: find_outliers(f, type_fit, method)
+        )
+        trends = sums.fit(trend_by)
+        if years:
+            outliers = outliers[outliers["year"].isin(years)]
+            if trend_by == "year":
+                trends = trends[trends.index.isin([str(y) for y in years])]
+        if event_types:
+            outliers = outliers[outliers["event_type"].astype(str).isin(event_types)]
+            if trend_by == "event_type":
+                trends = trends[trends.index.isin(event_types)]
+        rec["rows_out"] = len(outliers)
+
+    position = {int(s): i for i, s in enumerate(summary.severities)}
+    points = outliers.head(MAX_HIGHLIGHT) if highlight else outliers.iloc[:0]
+    points = points[points["severity"].astype(int).isin(position)]
 
     # -----------------------
-    # 3) Styling (dark + white faint box)
+    # 2) Build violin figure (KDE outlines + precomputed boxes)
     # -----------------------
-    fig_v.update_layout(
-        template="plotly_dark",
-        height=650,
-        title=dict(font=dict(size=24)),
-        font=dict(size=18),
-    )
+    def _build():
+        fig_v = go.Figure()
+        half_width = 0.45
 
-    # Make box white but MORE FADED (you asked: "לבן קצת יותר דהוי")
-    # Note: box options apply via update_traces for violin traces.
-    fig_v.update_traces(
-        box_fillcolor="rgba(255,255,255,0.75)",  # <- change opacity here
-        box_line_color="rgba(0,0,0,1)",
-        box_line_width=1.5,
-        line_color="rgba(126,200,245,0.85)",     # violin outline (subtle)
-    )
+        for i, sev in enumerate(severity_order):
+            row = stats.iloc[i]
+            dens = summary.density[i]
+            inside = dens > 0
+            y = summary.grid[inside]
+            # every violin as wide as the others at its mode (px.violin scalemode="width")
+            w = dens[inside] / dens.max() * half_width
 
-    fig_v.update_xaxes(title_font=dict(size=25), tickfont=dict(size=20))
-    fig_v.update_yaxes(title_font=dict(size=25), tickfont=dict(size=20))
+            # Hover: show only summary stats (no y, no kde)
+            hover = (
+                f"<b>Severity:</b> {sev}<br>"
+                f"<b>min:</b> {row['min']:.2f}<br>"
+                f"<b>q1:</b> {row['q1']:.2f}<br>"
+                f"<b>median:</b> {row['median']:.2f}<br>"
+                f"<b>q3:</b> {row['q3']:.2f}<br>"
+                f"<b>max:</b> {row['max']:.2f}"
+            )
+
+            fig_v.add_trace(go.Scatter(
+                x=np.concatenate([i - w, (i + w)[::-1]]).astype("float32"),
+                y=np.concatenate([y, y[::-1]]).astype("float32"),
+                fill="toself",
+                mode="lines",
+                name=sev,
+                text=hover,
+                hoveron="fills",
+                hoverinfo="text",
+                showlegend=False,
+            ))
+
+            fig_v.add_trace(go.Box(
+                x=[i],
+                q1=[row["q1"]],
+                median=[row["median"]],
+                q3=[row["q3"]],
+                lowerfence=[row["lowerfence"]],
+                upperfence=[row["upperfence"]],
+                width=0.12,
+                hoverinfo="skip",
+                showlegend=False,
+            ))
+
+        if len(points):
+            fig_v.add_trace(go.Scatter(
+                x=points["severity"].astype(int).map(position).to_numpy(dtype="float32"),
+                y=points["log10_impact"].to_numpy(dtype="float32"),
+                mode="markers",
+                name="Outliers",
+                marker=dict(color="rgba(239,85,59,0.9)", size=7, symbol="diamond"),
+                customdata=np.stack([
+                    points["event_type"].astype(str).map(clean_event_label),
+                    points["country"].astype(str),
+                    points["year"].astype(int),
+                    points["score"].round(2),
+                ], axis=1),
+                hovertemplate=(
+                    "%{customdata[0]} · %{customdata[1]} · %{customdata[2]}<br>"
+                    "log10 impact %{y:.2f} · score %{customdata[3]}<extra></extra>"
+                ),
+                showlegend=False,
+            ))
+
+        fig_v.update_layout(
+            title="Economic Impact Distribution by Severity (Violin + Box, log10 scale)",
+            xaxis=dict(
+                title="Severity",
+                tickmode="array",
+                tickvals=list(range(len(severity_order))),
+                ticktext=severity_order,
+            ),
+            yaxis=dict(title="log10(Economic Impact in Million USD)"),
+        )
+
+        # -----------------------
+        # 3) Styling (dark + white faint box)
+        # -----------------------
+        fig_v.update_layout(
+            template="plotly_dark",
+            height=650,
+            title=dict(font=dict(size=24)),
+            font=dict(size=18),
+        )
+
+        # Make box white but MORE FADED (you asked: "לבן קצת יותר דהוי")
+        fig_v.update_traces(
+            fillcolor="rgba(255,255,255,0.75)",  # <- change opacity here
+            line=dict(color="rgba(0,0,0,1)", width=1.5),
+            selector=dict(type="box"),
+        )
+        fig_v.update_traces(
+            fillcolor="rgba(99,110,250,0.5)",
+            line=dict(color="rgba(126,200,245,0.85)"),  # violin outline (subtle)
+            selector=dict(type="scatter", mode="lines"),
+        )
+
+        fig_v.update_xaxes(title_font=dict(size=25), tickfont=dict(size=20))
+        fig_v.update_yaxes(title_font=dict(size=25), tickfont=dict(size=20))
+        return fig_v
+
+    # Summaries only change with the data: repeat visits reuse the cached figure JSON
+    with stage("figure"):
+        fig_v = cached_figure(_build, "severity", stats, summary.grid, summary.density, points)
+
+    chart(fig_v, use_container_width=True)
 
     # -----------------------
-    # 4) Hover: show only summary stats (no y, no kde)
+    # 4) Trend + outlier tables
     # -----------------------
-    fig_v.update_traces(
-        hoveron="violins",  # <-- חשוב: בלי "kde"
-        hovertemplate=(
-            "<b>Severity:</b> %{x}<br>"
-            "<b>min:</b> %{min:.2f}<br>"
-            "<b>q1:</b> %{q1:.2f}<br>"
-            "<b>median:</b> %{median:.2f}<br>"
-            "<b>q3:</b> %{q3:.2f}<br>"
-            "<b>max:</b> %{max:.2f}"
-            "<extra></extra>"
-        )
+    st.subheader(f"Trend of log10 impact per severity step, by {TREND_BY[trend_by].lower()}")
+    table = trends.rename(columns={"n": "Events", "slope": "Slope", "intercept": "Intercept", "r2": "R²"})
+    if trend_by == "event_type":
+        table.index = table.index.map(clean_event_label)
+    table.index.name = TREND_BY[trend_by]
+    st.dataframe(
+        table.sort_values("Slope", ascending=False),
+        column_config={
+            "Slope": st.column_config.NumberColumn(format="%.3f"),
+            "Intercept": st.column_config.NumberColumn(format="%.2f"),
+            "R²": st.column_config.NumberColumn(format="%.3f"),
+        },
+        use_container_width=True,
     )
 
-    st.plotly_chart(fig_v, use_container_width=True)
\ No newline at end of file
+    st.subheader(f"Outliers vs their event type's trend ({len(outliers):,})")
+    st.caption(
+        f"Robust z = 0.6745 · (residual − median) / MAD, flagged beyond ±{ROBUST_Z:g}."
+        if method == "robust_z" else
+        f"Residual beyond {IQR_K:g} × IQR from the quartiles; score in IQRs past the fence."
+    )
+    shown = outliers.head(MAX_TABLE_ROWS)
+    shown = shown.assign(event_type=shown["event_type"].astype(str).map(clean_event_label))
+    if pd.api.types.is_integer_dtype(shown["event_id"]):
+        shown = shown.assign(event_id=shown["event_id"].map(format_event_id))
+    st.dataframe(
+        shown,
+        column_config={
+            "log10_impact": st.column_config.NumberColumn("log10 impact", format="%.2f"),
+            "expected": st.column_config.NumberColumn("Trend", format="%.2f"),
+            "score": st.column_config.NumberColumn("Score", format="%.2f"),
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
\ No newline at end of file
@@ -3,6 +3,239 @@
 # ---------------------------------------------------------
 
 from imports import *
+import os
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+from dataset import get_prepared, month_bounds, month_slice, unpack_mask
+import duckdb_backend
+import streaming
+from aggregates import SPATIAL_COLUMNS, spatial_bins, spatial_table
+from caching import LRUCache
+from instrument import stage, chart
+from figures import cached_figure
+
+# Above this many events (after filters + time) "Auto" detail switches to grid cells
+MAP_POINT_THRESHOLD = int(os.environ.get("MAP_POINT_THRESHOLD", 20000))
+
+# "Auto" renderer: WebGL (MapLibre) instead of SVG markers above this many markers;
+# with WebGL, "Auto" detail keeps individual points up to MAP_WEBGL_POINT_THRESHOLD
+MAP_WEBGL_THRESHOLD = int(os.environ.get("MAP_WEBGL_THRESHOLD", 5000))
+MAP_WEBGL_POINT_THRESHOLD = int(os.environ.get("MAP_WEBGL_POINT_THRESHOLD", 250000))
+
+# Compact payload (default on): points carry only what the encoding shows + event_id;
+# full details are looked up server-side when a point is clicked
+MAP_COMPACT_PAYLOAD = os.environ.get("MAP_COMPACT_PAYLOAD", "1").lower() not in ("0", "false", "no", "off")
+
+# Memory budget for cached filter results (row positions), per data version
+MAP_FILTER_CACHE_MB = int(os.environ.get("MAP_FILTER_CACHE_MB", 64))
+
+
+def _map_options(df: pd.DataFrame):
+    df = df[df["has_coords"]]
+    type_map = None
+    if "event_type" in df.columns:
+        type_map = (
+            df[["event_type", "event_type_clean"]]
+            .dropna()
+            .drop_duplicates()
+            .sort_values("event_type_clean")
+        )
+    sev = df["severity"].dropna()
+    sev_bounds = (float(sev.min()), float(sev.max())) if len(sev) else (0.0, 10.0)
+    countries = sorted(df["country"].dropna().astype(str).unique().tolist()) if "country" in df.columns else []
+    return type_map, sev_bounds, countries
+
+def _offline_map_style() -> dict:
+    # MapLibre style with no tile / glyph sources (works without network):
+    # dark background + a 30° graticule for orientation
+    lines = [[[lon, lat] for lat in range(-90, 91, 5)] for lon in range(-180, 181, 30)]
+    lines += [[[lon, lat] for lon in range(-180, 181, 5)] for lat in range(-60, 61, 30)]
+    return {
+        "version": 8,
+        "sources": {
+            "graticule": {
+                "type": "geojson",
+                "data": {"type": "Feature", "properties": {}, "geometry": {"type": "MultiLineString", "coordinates": lines}},
+            },
+        },
+        "layers": [
+            {"id": "background", "type": "background", "paint": {"background-color": "#111111"}},
+            {"id": "graticule", "type": "line", "source": "graticule",
+             "paint": {"line-color": "#444444", "line-width": 0.6}},
+        ],
+    }
+
+
+OFFLINE_MAP_STYLE = _offline_map_style()
+
+# Display precision used when the compact payload mode rounds point data
+DISPLAY_DECIMALS = {"latitude": 2, "longitude": 2, "economic_impact_million_usd": 2}
+
+# Playback speed (ms per month)
+PLAYBACK_FRAME_MS = int(os.environ.get("MAP_PLAYBACK_FRAME_MS", 500))
+
+# Encodings of aggregated markers: point column -> bin column
+BIN_COLUMNS = {
+    "severity": "severity_max",
+    "event_type_clean": "top_event_type",
+    "economic_impact_million_usd": "impact_sum",
+}
+BIN_HOVER = {"events": True, "impact_sum": ":.2f", "severity_max": True, "top_event_type": True}
+BIN_LABELS = {
+    "events": "Events",
+    "impact_sum": "Economic Impact (M USD, sum)",
+    "severity_max": "Max severity",
+    "top_event_type": "Most frequent type",
+}
+
+
+def _playback_figure(df, by, cell_deg, color, size, webgl, title, labels):
+    """One animation frame per month of the month-sorted `df`, played in the browser.
+
+    Frames carry only lat/lon (2 decimals) and the color / size values the
+    encoding needs; scales are fixed over all months so frames stay comparable.
+    Built as plain dicts: hundreds of traces are too slow through go.* validation.
+    """
+    months, offsets = month_bounds(df)
+    per_month = []
+    for lo, hi in zip(offsets[:-1], offsets[1:]):
+        rows = df.iloc[lo:hi]
+        per_month.append(spatial_bins(rows, by=by, cell_deg=cell_deg) if by else rows)
+    everything = pd.concat(per_month, ignore_index=True)
+
+    groups = None
+    if color is not None and not pd.api.types.is_numeric_dtype(everything[color]):
+        groups = sorted(everything[color].dropna().astype(str).unique())
+        palette = px.colors.qualitative.Plotly
+    elif color is not None:
+        cmin, cmax = float(everything[color].min()), float(everything[color].max())
+    if size is not None:
+        smax = float(everything[size].max()) or 1.0
+
+    trace_type = "scattermap" if webgl else "scattergeo"
+
+    def _traces(rows):
+        lat = rows["latitude"].to_numpy(dtype=np.float32).round(2)
+        lon = rows["longitude"].to_numpy(dtype=np.float32).round(2)
+        marker_size = (
+            (4 + 16 * np.sqrt(rows[size].to_numpy(dtype=np.float32) / smax)).round(1)
+            if size is not None else 6
+        )
+        base = dict(type=trace_type, mode="markers", lat=lat, lon=lon)
+        if groups is not None:
+            keys = rows[color].astype(str).to_numpy()
+            out = []
+            for i, g in enumerate(groups):
+                sel = keys == g
+                out.append(dict(
+                    base, lat=lat[sel], lon=lon[sel], name=g, hoverinfo="name",
+                    marker=dict(color=palette[i % len(palette)], opacity=0.75,
+                                size=marker_size[sel] if size is not None else marker_size),
+                ))
+            return out
+        marker = dict(size=marker_size, opacity=0.75)
+        if color is not None:
+            marker.update(
+                color=rows[color].to_numpy(dtype=np.float32).round(2), cmin=cmin, cmax=cmax,
+                colorscale="Plasma", showscale=True, colorbar=dict(title=labels.get(color, color)),
+            )
+            base["hovertemplate"] = f"{labels.get(color, color)}: %{{marker.color}}<extra></extra>"
+        return [dict(base, marker=marker, showlegend=False)]
+
+    names = [f"{m:%Y-%m}" for m in pd.to_datetime(months)]
+    frames = [dict(name=n, data=_traces(rows)) for n, rows in zip(names, per_month)]
+
+    play = dict(frame=dict(duration=PLAYBACK_FRAME_MS, redraw=True), fromcurrent=True, transition=dict(duration=0))
+    jump = dict(frame=dict(duration=0, redraw=True), mode="immediate", transition=dict(duration=0))
+    layout = dict(
+        template=pio.templates["plotly_dark"].to_plotly_json(),  # named templates resolve only under validation
+        height=650,
+        margin=dict(l=10, r=10, t=50, b=10),
+        title=title,
+        updatemenus=[dict(
+            type="buttons", direction="left", x=0, y=0, xanchor="left", yanchor="top", pad=dict(t=40, r=10),
+            buttons=[
+                dict(label="▶ Play", method="animate", args=[None, play]),
+                dict(label="⏸ Pause", method="animate", args=[[None], dict(jump, frame=dict(duration=0, redraw=False))]),
+            ],
+        )],
+        sliders=[dict(
+            x=0.12, len=0.88, y=0, yanchor="top", pad=dict(t=30),
+            currentvalue=dict(prefix="Month: "),
+            steps=[dict(label=n, method="animate", args=[[n], jump]) for n in names],
+        )],
+    )
+    if webgl:
+        layout["map"] = dict(style=OFFLINE_MAP_STYLE, zoom=0.6, center=dict(lat=20, lon=0))
+    else:
+        layout["geo"] = dict(projection=dict(type="natural earth"))
+
+    data = frames[0]["data"] if frames else []
+    return go.Figure(dict(data=data, layout=layout, frames=frames), _validate=False)
+
+
+def _show_clicked_events(ds, event):
+    # Full rows of the clicked points, looked up server-side by event_id
+    points = event.selection.points if event else []
+    # compact payload: customdata is the event_id; full: [event_id, *hover columns]
+    ids = [p["customdata"] for p in points if p.get("customdata") is not None]
+    ids = [i[0] if isinstance(i, list) else i for i in ids]
+    if not ids:
+        st.caption("Click a point on the map to see the full event details.")
+        return
+
+    rows = ds.rows_by_event_id(ids)
+    rows = rows[[c for c in ds.columns or rows.columns if c in rows.columns]]
+    if pd.api.types.is_integer_dtype(rows["event_id"]):
+        rows = rows.assign(event_id=rows["event_id"].map(format_event_id))
+    st.markdown(f"**Selected event{'s' if len(rows) > 1 else ''}**")
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+
+
+def _show_archive_bins(ds, color_by, size_by, renderer_label):
+    """Whole archive from the streamed grid / country bins (GC_STREAMING=1 holds only recent rows)."""
+    st.markdown("### Whole archive (binned)")
+    by = st.radio(
+        "Bins",
+        ["grid", "country"],
+        format_func={"grid": f"{streaming.MAP_CELL_DEG:g}° grid cells", "country": "Countries"}.get,
+        horizontal=True,
+        key="map_archive_by",
+    )
+    build, merge = streaming.STREAMED[f"map_bins:{by}"]
+    bins = spatial_table(ds.aggregate(f"map_bins:{by}", build, merge, columns=SPATIAL_COLUMNS), by)
+    st.caption(
+        f"{int(bins['events'].sum()):,} events up to the end of the archive in {len(bins):,} bins, "
+        "aggregated while streaming the file. The filters and the time range above don't apply here."
+    )
+    if bins.empty:
+        return
+
+    color = BIN_COLUMNS[color_by]
+    size = BIN_COLUMNS[size_by] if size_by is not None else None
+    hover_cols = {"country": True, **BIN_HOVER} if by == "country" else BIN_HOVER
+    webgl = renderer_label == "WebGL" or (renderer_label == "Auto" and len(bins) > MAP_WEBGL_THRESHOLD)
+
+    def _build():
+        scatter, base = (
+            (px.scatter_map, dict(map_style=OFFLINE_MAP_STYLE, zoom=0.6, center=dict(lat=20, lon=0)))
+            if webgl else (px.scatter_geo, dict(projection="natural earth"))
+        )
+        plot_df = bins.fillna({"severity_max": 0}) if size == "severity_max" else bins
+        fig = scatter(
+            plot_df, lat="latitude", lon="longitude", color=color, size=size,
+            hover_data=hover_cols, labels=BIN_LABELS, **base,
+        )
+        fig.update_traces(marker=dict(opacity=0.75))
+        fig.update_layout(
+            template="plotly_dark", height=650, margin=dict(l=10, r=10, t=50, b=10),
+            title="Whole archive — events aggregated while streaming",
+        )
+        return fig
+
+    chart(cached_figure(_build, "map_archive", bins, by, color, size, webgl), use_container_width=True)
+
 
 def show_worldmap():
     st.title("🗺️ World Map")
@@ -14,38 +247,19 @@ def show_worldmap():
     # -----------------------
     # Load + clean
     # -----------------------
-    gc = load_gc()
-    df = gc.copy()
-
-    # Ensure numeric
-    df["latitude"] = pd.to_numeric(df.get("latitude"), errors="coerce")
-    df["longitude"] = pd.to_numeric(df.get("longitude"), errors="coerce")
-    df["severity"] = pd.to_numeric(df.get("severity"), errors="coerce")
-    df["economic_impact_million_usd"] = pd.to_numeric(df.get("economic_impact_million_usd"), errors="coerce")
-    df["year"] = pd.to_numeric(df.get("year"), errors="coerce")
-    df["month"] = pd.to_numeric(df.get("month"), errors="coerce")
-
-    # Drop rows without coordinates / time
-    df = df.dropna(subset=["latitude", "longitude", "year", "month"]).copy()
-    df["year"] = df["year"].astype(int)
-    df["month"] = df["month"].astype(int)
-
-    # Remove partial year 2025 (if relevant)
-    df = df[df["year"] < 2025].copy()
-
-    # Monthly time key
-    df["date"] = pd.to_datetime(dict(year=df["year"], month=df["month"], day=1), errors="coerce")
-    df = df.dropna(subset=["date"]).copy()
-
-    # Clean event type label for UI/hover
-    if "event_type" in df.columns:
-        df["event_type_clean"] = (
-            df["event_type"].astype(str)
-            .str.replace("_", " ", regex=False)
-            .str.title()
+    # Coordinates, month start and clean labels come precomputed
+    with stage("load") as rec:
+        ds = get_prepared()
+        df = ds.view()
+        type_map, (sev_min, sev_max), country_options = ds.aggregate("map_options", _map_options)
+        rec["rows_out"] = len(df)
+
+    if ds.windowed:
+        st.caption(
+            f"Streaming mode: events are held as rows from **{pd.Timestamp(ds.start):%Y-%m}** on, so the filters, "
+            "quick stats, time range and map below cover those months only. "
+            "The whole archive is shown binned under the time range."
         )
-    else:
-        df["event_type_clean"] = "Unknown"
 
     # -----------------------
     # Filters (NOT time)
@@ -57,12 +271,6 @@ def show_worldmap():
     with col1:
         # Show cleaned names in UI, but filter by original values
         if "event_type" in df.columns:
-            type_map = (
-                df[["event_type", "event_type_clean"]]
-                .dropna()
-                .drop_duplicates()
-                .sort_values("event_type_clean")
-            )
             type_labels = type_map["event_type_clean"].tolist()
             label_to_raw = dict(zip(type_map["event_type_clean"], type_map["event_type"]))
 
@@ -77,8 +285,6 @@ def show_worldmap():
             selected_types_raw = []
 
     with col2:
-        sev_min = float(df["severity"].min()) if df["severity"].notna().any() else 0.0
-        sev_max = float(df["severity"].max()) if df["severity"].notna().any() else 10.0
         severity_range = st.slider(
             "Severity range",
             min_value=float(sev_min),
@@ -104,6 +310,52 @@ def show_worldmap():
             key="map_size_by",
         )
 
+    # Raw points vs server-side aggregation, SVG vs WebGL rendering
+    a1, a2, a3, a4 = st.columns([2.2, 2.0, 2.0, 2.2])
+
+    with a1:
+        detail_label = st.selectbox(
+            "Map detail",
+            ["Auto", "Points", "Grid cells", "Countries", "Density"],
+            index=0,
+            key="map_detail",
+            help=(
+                f"Auto shows individual events up to {MAP_POINT_THRESHOLD:,} points with the SVG renderer "
+                f"({MAP_WEBGL_POINT_THRESHOLD:,} with WebGL), grid cells above that. Density is a WebGL heatmap."
+            ),
+        )
+
+    with a2:
+        renderer_label = st.selectbox(
+            "Renderer",
+            ["Auto", "SVG (geo)", "WebGL"],
+            index=0,
+            key="map_renderer",
+            help=f"Auto switches to WebGL above {MAP_WEBGL_THRESHOLD:,} markers. WebGL maps have no background tiles.",
+        )
+        compact = st.toggle(
+            "Compact payload",
+            value=MAP_COMPACT_PAYLOAD,
+            key="map_compact",
+            help="Send only the encoded values (rounded) per point; click a point for its full details.",
+        )
+
+    with a3:
+        cell_deg = st.select_slider(
+            "Grid cell (degrees)",
+            options=[0.5, 1.0, 2.0, 5.0, 10.0],
+            value=2.0,
+            key="map_cell_deg",
+        )
+
+    with a4:
+        selected_countries = st.multiselect(
+            "Countries (optional)",
+            options=country_options,
+            default=[],
+            key="map_countries",
+        )
+
     # map UI labels -> actual column names
     color_by = {
         "Severity": "severity",
@@ -117,25 +369,51 @@ def show_worldmap():
         "None": None,
     }[size_by_label]
 
-    # Apply filters (except time)
-    df_f = df.copy()
-
-    if selected_types_raw and "event_type" in df_f.columns:
-        df_f = df_f[df_f["event_type"].isin(selected_types_raw)].copy()
+    # Apply filters (except time).
+    # Results are cached as row positions keyed by the canonical filter state, so
+    # cosmetic changes (color/size/detail) and toggling back and forth skip the masks.
+    filter_cache = ds.aggregate("map_filter_cache", lambda _: LRUCache(MAP_FILTER_CACHE_MB << 20))
+    filter_key = (
+        tuple(sorted(str(t) for t in selected_types_raw)),
+        tuple(sorted(selected_countries)),
+        float(severity_range[0]),
+        float(severity_range[1]),
+    )
 
-    if df_f["severity"].notna().any():
-        df_f = df_f[df_f["severity"].between(severity_range[0], severity_range[1], inclusive="both")].copy()
+    def _filter_rows() -> np.ndarray:
+        severity = tuple(severity_range) if df["severity"].notna().any() else None
+        if duckdb_backend.enabled():
+            # SQL over the store; the matching ids come back as row positions of the frame
+            ids = duckdb_backend.filter_events(
+                selected_types_raw or None, selected_countries or None, severity, columns=["event_id"]
+            )["event_id"]
+            return ds.event_positions(ids)
+
+        # Categorical filters: OR within a multiselect, AND across them (packed bitmaps)
+        bits = ds.aggregate("bitmap:has_coords", lambda f: np.packbits(f["has_coords"].to_numpy()))
+        if selected_types_raw and "event_type" in df.columns:
+            bits = bits & ds.index("event_type").select(selected_types_raw)
+        if selected_countries:
+            bits = bits & ds.index("country").select(selected_countries)
+        mask = unpack_mask(bits, len(df))
+
+        if severity is not None:
+            mask &= df["severity"].between(*severity, inclusive="both").to_numpy()
+        return np.flatnonzero(mask)
+
+    with stage("filter", rows_in=len(df)) as rec:
+        df_f = df.iloc[filter_cache.get_or_compute(filter_key, _filter_rows)]
+        rec["rows_out"] = len(df_f)
 
     # Safety: if nothing left, stop early
     if df_f.empty:
-        st.warning("No data after filters. Try widening filters (event types / severity).")
+        st.warning("No data after filters. Try widening filters (event types / countries / severity).")
         return
 
-    # Optional size column (must be non-negative)
+    # Optional size column (must be non-negative; clipped after the time slice)
     size_col = None
     if size_by is not None and size_by in df_f.columns:
         size_col = size_by
-        df_f[size_col] = df_f[size_col].fillna(0).clip(lower=0)
 
     # -----------------------
     # Quick stats (ALL filtered, before time)
@@ -147,7 +425,8 @@ def show_worldmap():
     with s2:
         st.metric("Countries", f"{df_f['country'].nunique():,}" if "country" in df_f.columns else "n/a")
     with s3:
-        st.metric("Date span", f"{df_f['date'].min():%Y-%m} → {df_f['date'].max():%Y-%m}")
+        # month_start orders the frame ("date" is the event's own day and may be missing)
+        st.metric("Date span", f"{df_f['month_start'].iloc[0]:%Y-%m} → {df_f['month_start'].iloc[-1]:%Y-%m}")
 
     st.write("")
 
@@ -156,8 +435,9 @@ def show_worldmap():
     # Slider will be placed at the BOTTOM, but we need its value now.
     # We'll set it via session_state if not set yet.
     # -----------------------
-    min_date = df_f["date"].min()
-    max_date = df_f["date"].max()
+    # df_f is still month-sorted (filters only drop rows), so the ends are the bounds
+    min_date = df_f["month_start"].iloc[0]
+    max_date = df_f["month_start"].iloc[-1]
 
     if "map_month_range" not in st.session_state:
         st.session_state["map_month_range"] = (min_date.to_pydatetime(), max_date.to_pydatetime())
@@ -166,8 +446,12 @@ def show_worldmap():
     start_dt = pd.to_datetime(start_dt)
     end_dt = pd.to_datetime(end_dt)
 
-    # Filter by the current range (initially: all months)
-    df_t = df_f[(df_f["date"] >= start_dt) & (df_f["date"] <= end_dt)].copy()
+    # Filter by the current range (initially: all months) -> binary search, no copy
+    with stage("time_slice", rows_in=len(df_f)) as rec:
+        df_t = month_slice(df_f, start_dt, end_dt)
+        if size_col is not None:
+            df_t[size_col] = df_t[size_col].fillna(0).clip(lower=0)
+        rec["rows_out"] = len(df_t)
 
     # -----------------------
     # MAP
@@ -175,32 +459,138 @@ def show_worldmap():
     title_range = f"{start_dt:%Y-%m} → {end_dt:%Y-%m}"
     st.subheader(f"World map — {title_range}")
 
-    hover_cols = []
-    for c in [
-        "year", "month", "country", "event_type_clean", "severity",
-        "economic_impact_million_usd", "affected_population", "deaths", "injuries"
-    ]:
-        if c in df_t.columns:
-            hover_cols.append(c)
-
-    fig_map = px.scatter_geo(
-        df_t,
-        lat="latitude",
-        lon="longitude",
-        color=color_by if color_by in df_t.columns else None,
-        size=size_col if (size_col is not None and size_col in df_t.columns) else None,
-        hover_data=hover_cols,
-        projection="natural earth",
-    )
+    # Playback toggle lives under the time slider (bottom); its value is needed now
+    playback = st.session_state.get("map_playback", False)
 
-    fig_map.update_layout(
-        template="plotly_dark",
-        height=650,
-        margin=dict(l=10, r=10, t=50, b=10),
-        title="Event locations (after filters + time range)"
-    )
-    fig_map.update_traces(marker=dict(opacity=0.75))
-    st.plotly_chart(fig_map, use_container_width=True)
+    with stage("figure", rows_in=len(df_t)):
+        n_points = len(df_t)
+        if detail_label == "Auto":
+            point_limit = MAP_POINT_THRESHOLD if renderer_label == "SVG (geo)" else MAP_WEBGL_POINT_THRESHOLD
+            aggregate_by = "grid" if n_points > point_limit else None
+        else:
+            aggregate_by = {"Points": None, "Grid cells": "grid", "Countries": "country", "Density": "density"}[detail_label]
+
+        labels = {}
+        if aggregate_by is None:
+            hover_cols = []
+            for c in [
+                "year", "month", "country", "event_type_clean", "severity",
+                "economic_impact_million_usd", "affected_population", "deaths", "injuries"
+            ]:
+                if c in df_t.columns:
+                    hover_cols.append(c)
+            if compact:
+                # Hover shows the encoded values only; the rest comes from the click lookup
+                hover_cols = []
+
+            # The figure only depends on these columns (+ the styling below)
+            used = ["latitude", "longitude", color_by, size_col, *hover_cols, "event_id"]
+            plot_df = df_t[[c for c in dict.fromkeys(used) if c in df_t.columns]]
+            if compact:
+                plot_df = plot_df.round(DISPLAY_DECIMALS)
+            color = color_by if color_by in plot_df.columns else None
+            size = size_col if (size_col is not None and size_col in plot_df.columns) else None
+            map_title = "Event locations (after filters + time range)"
+        elif aggregate_by == "density":
+            # Heatmap of event locations, weighted by the size option
+            plot_df = df_t[[c for c in ["latitude", "longitude", size_col] if c in df_t.columns]]
+            color, size, hover_cols = None, size_col, []
+            map_title = "Event density" + (f" weighted by {size_by_label}" if size_col else "")
+        else:
+            # One marker per bin: count / summed impact / max severity / dominant type
+            plot_df = spatial_bins(df_t, by=aggregate_by, cell_deg=cell_deg)
+
+            color = BIN_COLUMNS[color_by]
+            size = BIN_COLUMNS[size_col] if size_col is not None else None
+            hover_cols = BIN_HOVER
+            if aggregate_by == "country":
+                hover_cols = {"country": True, **hover_cols}
+            labels = BIN_LABELS
+
+            unit = "countries" if aggregate_by == "country" else f"{cell_deg:g}° grid cells"
+            map_title = f"Events aggregated into {unit}"
+            st.caption(
+                f"{n_points:,} events rolled up into {len(plot_df):,} {unit}. "
+                "Narrow the filters / time range or pick **Points** under Map detail to see individual events."
+            )
+
+        # Individual events can be clicked for their full row (looked up by event_id)
+        selectable = aggregate_by is None and not playback and "event_id" in plot_df.columns
+        numeric_ids = selectable and pd.api.types.is_integer_dtype(plot_df["event_id"])
+
+        # SVG markers stall the browser beyond a few thousand: WebGL (MapLibre, no tiles) above that
+        webgl = (
+            aggregate_by == "density"
+            or renderer_label == "WebGL"
+            or (renderer_label == "Auto" and len(plot_df) > MAP_WEBGL_THRESHOLD)
+        )
+        if webgl:
+            st.caption(f"Rendered with WebGL ({len(plot_df):,} markers) on an offline base map: lat/lon grid only.")
+
+        def _build():
+            if aggregate_by == "density":
+                fig_map = px.density_map(
+                    plot_df, lat="latitude", lon="longitude", z=size, radius=8,
+                    map_style=OFFLINE_MAP_STYLE, zoom=0.6, center=dict(lat=20, lon=0),
+                )
+            else:
+                scatter, base = (
+                    (px.scatter_map, dict(map_style=OFFLINE_MAP_STYLE, zoom=0.6, center=dict(lat=20, lon=0)))
+                    if webgl else (px.scatter_geo, dict(projection="natural earth"))
+                )
+                fig_map = scatter(
+                    plot_df,
+                    lat="latitude",
+                    lon="longitude",
+                    color=color,
+                    size=size,
+                    hover_data=hover_cols,
+                    custom_data=["event_id"] if selectable else None,
+                    labels=labels,
+                    **base,
+                )
+                fig_map.update_traces(marker=dict(opacity=0.75))
+                if compact and selectable:
+                    # event_id per point as a flat int array (px sends [[id], ...] as JSON lists)
+                    # and a hover built from the marker values already in the payload
+                    numeric_color = color is not None and pd.api.types.is_numeric_dtype(plot_df[color])
+                    for trace in fig_map.data:
+                        ids = np.asarray(trace.customdata)[:, 0]
+                        trace.customdata = ids.astype(np.int32) if numeric_ids else ids.astype(str)
+                        hover = []
+                        if color is not None:
+                            hover.append(f"{color}=" + ("%{marker.color:.2~f}" if numeric_color else trace.name))
+                        if size is not None:
+                            hover.append(f"{size}=%{{marker.size:.2~f}}")
+                        trace.hovertemplate = "<br>".join(hover) + "<extra></extra>"
+            fig_map.update_layout(
+                template="plotly_dark",
+                height=650,
+                margin=dict(l=10, r=10, t=50, b=10),
+                title=map_title
+            )
+            return fig_map
+
+        if playback:
+            # Month by month in the browser: no rerun per step; bins are recomputed per month
+            by = aggregate_by if aggregate_by in ("grid", "country") else None
+            cols = ["month_start", *SPATIAL_COLUMNS] if by else ["month_start", "latitude", "longitude", color, size]
+            frame_df = df_t[[c for c in dict.fromkeys(cols) if c in df_t.columns]]
+            title = f"{map_title} — monthly playback"
+            frame_labels = {color_by: color_by_label, **labels}
+            fig_map = cached_figure(
+                lambda: _playback_figure(frame_df, by, cell_deg, color, size, webgl, title, frame_labels),
+                "map_playback", frame_df, by, cell_deg, color, size, webgl, title, frame_labels, PLAYBACK_FRAME_MS,
+            )
+        else:
+            # Same points / bins + same styling (e.g. toggling back to a previous filter) -> cached figure
+            fig_map = cached_figure(_build, "map", plot_df, aggregate_by, color, size, map_title, webgl, selectable)
+
+    if selectable:
+        event = chart(fig_map, use_container_width=True, on_select="rerun", selection_mode="points", key="map_chart")
+        _show_clicked_events(ds, event)
+    else:
+        chart(fig_map, use_container_width=True)
 
     # -----------------------
     # TIME SLIDER (BOTTOM) — month RANGE
@@ -218,4 +608,21 @@ def show_worldmap():
     )
 
     # optional: show what’s selected in text
-    st.caption(f"Showing events from **{pd.to_datetime(month_range[0]):%Y-%m}** to **{pd.to_datetime(month_range[1]):%Y-%m}**.")
\ No newline at end of file
+    st.caption(f"Showing events from **{pd.to_datetime(month_range[0]):%Y-%m}** to **{pd.to_datetime(month_range[1]):%Y-%m}**.")
+
+    st.toggle(
+        "▶ Monthly playback",
+        key="map_playback",
+        help="Animate the selected month range month by month in the browser (play / pause / scrub under the map) "
+             "instead of re-running the page for every slider drag.",
+    )
+
+    if ds.windowed:
+        _show_archive_bins(ds, color_by, size_col, renderer_label)
+
+    with st.expander("Filter cache", expanded=False):
+        cs = filter_cache.stats()
+        st.caption(
+            f"{cs['hits']:,} hits / {cs['misses']:,} misses · {cs['entries']:,} entries · "
+            f"{cs['bytes'] / 2**20:.1f} of {cs['max_bytes'] / 2**20:.0f} MB"
+        )
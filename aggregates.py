@@ -0,0 +1,506 @@
+# ---------------------------------------------------------
+# Precomputed aggregates over the prepared frame
+# ---------------------------------------------------------
+# Built once per data version (see PreparedData.aggregate) so page reruns
+# only slice small NumPy arrays instead of grouping rows.
+
+from imports import *
+from executor import map_reduce
+from functools import partial
+
+
+class CountCube:
+    """Event counts indexed by year x month (1..12) x event_type."""
+
+    COLUMNS = ["year", "month", "event_type"]
+
+    def __init__(self, years: np.ndarray, event_types: list, counts: np.ndarray):
+        self.years = years
+        self.event_types = event_types
+        self.counts = counts
+        self.type_index = {e: i for i, e in enumerate(event_types)}
+        self.year_index = {int(y): i for i, y in enumerate(years)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "CountCube":
+        df = df[df["event_type"].notna()]
+        event_types = sorted(df["event_type"].astype(str).unique().tolist())
+        if df.empty:
+            return cls(np.array([], dtype=int), event_types, np.zeros((0, 12, 0), dtype=np.int64))
+
+        year = df["year"].to_numpy().astype(np.int64)
+        month = df["month"].to_numpy().astype(np.int64)
+        types = pd.Categorical(df["event_type"].astype(str), categories=event_types).codes.astype(np.int64)
+
+        y0 = int(year.min())
+        years = np.arange(y0, int(year.max()) + 1)
+        n_types = len(event_types)
+
+        flat = ((year - y0) * 12 + (month - 1)) * n_types + types
+        counts = np.bincount(flat, minlength=len(years) * 12 * n_types)
+        return cls(years, event_types, counts.reshape(len(years), 12, n_types))
+
+    @staticmethod
+    def merge(a: "CountCube", b: "CountCube") -> "CountCube":
+        # Sum two cubes over the union of their year / event_type axes
+        if not len(b.years):
+            return a
+        if not len(a.years):
+            return b
+        years = np.arange(min(a.years[0], b.years[0]), max(a.years[-1], b.years[-1]) + 1)
+        event_types = sorted(set(a.event_types) | set(b.event_types))
+        pos = {e: i for i, e in enumerate(event_types)}
+
+        counts = np.zeros((len(years), 12, len(event_types)), dtype=np.int64)
+        for cube in (a, b):
+            yi = cube.years - years[0]
+            ti = np.array([pos[e] for e in cube.event_types], dtype=np.int64)
+            counts[np.ix_(yi, np.arange(12), ti)] += cube.counts
+        return CountCube(years, event_types, counts)
+
+    def by_year(self, type_idx) -> np.ndarray:
+        # -> [year, selected type]
+        return self.counts[:, :, type_idx].sum(axis=1)
+
+    def by_month(self, year: int, type_idx) -> np.ndarray:
+        # -> [month, selected type]
+        return self.counts[self.year_index[int(year)]][:, type_idx]
+
+
+class RollupCube:
+    """Sums of the impact measures per country x year x month x event_type.
+
+    Only non-empty cells are stored (a small long table), so any page can answer
+    "per year", "top countries", ... with a groupby over a few thousand rows.
+    """
+
+    KEYS = ["country", "year", "month", "event_type"]
+    MEASURES = [
+        "deaths", "injuries", "affected_population",
+        "economic_impact_million_usd", "international_aid_million_usd",
+    ]
+    COLUMNS = KEYS + MEASURES
+
+    def __init__(self, table: pd.DataFrame):
+        self.table = table  # KEYS + "events" + MEASURES, one row per non-empty cell
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "RollupCube":
+        keys = {k: pd.Categorical(df[k]) for k in cls.KEYS}
+        codes = [keys[k].codes.astype(np.int64) + 1 for k in cls.KEYS]  # missing (-1) -> 0
+        sizes = [len(keys[k].categories) + 1 for k in cls.KEYS]
+
+        cells, inv = np.unique(np.ravel_multi_index(codes, sizes), return_inverse=True)
+        country, year, month, event_type = (c - 1 for c in np.unravel_index(cells, sizes))
+
+        # year / month are never missing in the prepared frame -> plain small ints
+        table = pd.DataFrame({
+            "country": pd.Categorical.from_codes(country, categories=keys["country"].categories),
+            "year": np.asarray(keys["year"].categories)[year].astype(np.int16),
+            "month": np.asarray(keys["month"].categories)[month].astype(np.int8),
+            "event_type": pd.Categorical.from_codes(event_type, categories=keys["event_type"].categories),
+        })
+        table["events"] = np.bincount(inv, minlength=len(cells))
+        for m in cls.MEASURES:
+            values = df[m].to_numpy(dtype=np.float64, na_value=np.nan) if m in df.columns else np.zeros(len(df))
+            table[m] = np.bincount(inv, weights=np.nan_to_num(values), minlength=len(cells))
+        return cls(table)
+
+    @classmethod
+    def merge(cls, a: "RollupCube", b: "RollupCube") -> "RollupCube":
+        if b.table.empty:
+            return a
+        if a.table.empty:
+            return b
+        both = pd.concat([a.table, b.table], ignore_index=True)
+        for k in ("country", "event_type"):
+            both[k] = both[k].astype("category")
+        table = both.groupby(cls.KEYS, observed=True, dropna=False, sort=False).sum().reset_index()
+        return cls(table)
+
+    def totals(self, by, **where) -> pd.DataFrame:
+        """Summed events + measures grouped by `by` (a key or list of keys).
+
+        `where` filters on keys first, e.g. totals("country", year=2023).
+        """
+        t = self.table
+        for k, v in where.items():
+            t = t[t[k].isin(v if isinstance(v, (list, tuple, set)) else [v])]
+        by = [by] if isinstance(by, str) else list(by)
+        return t.groupby(by, observed=True)[["events", *self.MEASURES]].sum()
+
+
+def category_index(event_types: list, category_map: dict, norm) -> np.ndarray:
+    """event_type position -> position of its category in category_map (-1 = none)."""
+    cats = list(category_map)
+    lookup = {norm(e): i for i, c in enumerate(cats) for e in category_map[c]}
+    return np.array([lookup.get(norm(e), -1) for e in event_types], dtype=np.int64)
+
+
+SPATIAL_COLUMNS = ["latitude", "longitude", "country", "economic_impact_million_usd", "severity", "event_type_clean"]
+
+
+def _spatial_partial(df: pd.DataFrame, by: str = "grid", cell_deg: float = 2.0) -> dict:
+    # Per-bin sums / max / type counts of one row partition (see _merge_spatial)
+    df = df[df["latitude"].notna() & df["longitude"].notna()]
+    if by == "country":
+        df = df[df["country"].notna()]
+        countries = pd.Categorical(df["country"])
+
+    lat = df["latitude"].to_numpy(dtype=np.float64)
+    lon = df["longitude"].to_numpy(dtype=np.float64)
+
+    if by == "country":
+        key = countries.codes.astype(np.int64)
+    else:
+        n_lat, n_lon = int(np.ceil(180 / cell_deg)), int(np.ceil(360 / cell_deg))
+        # lat == 90 / lon == 180 belong to the last row / column, not one past it
+        lat_bin = np.clip(np.floor((lat + 90) / cell_deg).astype(np.int64), 0, n_lat - 1)
+        lon_bin = np.clip(np.floor((lon + 180) / cell_deg).astype(np.int64), 0, n_lon - 1)
+        key = lat_bin * n_lon + lon_bin
+
+    uniq, inv = np.unique(key, return_inverse=True)
+    n_bins = len(uniq)
+
+    impact = np.nan_to_num(df["economic_impact_million_usd"].to_numpy(dtype=np.float64))
+    severity = np.nan_to_num(df["severity"].to_numpy(dtype=np.float64), nan=-np.inf)
+    severity_max = np.full(n_bins, -np.inf)
+    np.maximum.at(severity_max, inv, severity)
+
+    types = pd.Categorical(df["event_type_clean"])
+    type_names = np.asarray(types.categories, dtype=object)
+    codes = types.codes.astype(np.int64)
+    ok = codes >= 0
+    n_types = len(type_names)
+    type_counts = np.bincount(inv[ok] * n_types + codes[ok], minlength=n_bins * n_types)
+
+    return {
+        # country bins are keyed by name so partials with different codes still line up
+        "keys": np.asarray(countries.categories, dtype=object)[uniq] if by == "country" else uniq,
+        "count": np.bincount(inv, minlength=n_bins),
+        "lat_sum": np.bincount(inv, weights=lat, minlength=n_bins),
+        "lon_sum": np.bincount(inv, weights=lon, minlength=n_bins),
+        "impact_sum": np.bincount(inv, weights=impact, minlength=n_bins),
+        "severity_max": severity_max,
+        "type_names": type_names,
+        "type_counts": type_counts.reshape(n_bins, n_types),
+    }
+
+
+def _merge_spatial(a: dict, b: dict) -> dict:
+    keys = np.union1d(a["keys"], b["keys"])
+    type_names = np.asarray(list(dict.fromkeys([*a["type_names"], *b["type_names"]])), dtype=object)
+    type_pos = {t: i for i, t in enumerate(type_names)}
+
+    out = {
+        "keys": keys,
+        "count": np.zeros(len(keys), dtype=np.int64),
+        "lat_sum": np.zeros(len(keys)),
+        "lon_sum": np.zeros(len(keys)),
+        "impact_sum": np.zeros(len(keys)),
+        "severity_max": np.full(len(keys), -np.inf),
+        "type_names": type_names,
+        "type_counts": np.zeros((len(keys), len(type_names)), dtype=np.int64),
+    }
+    for part in (a, b):
+        idx = np.searchsorted(keys, part["keys"])
+        for col in ("count", "lat_sum", "lon_sum", "impact_sum"):
+            out[col][idx] += part[col]
+        out["severity_max"][idx] = np.maximum(out["severity_max"][idx], part["severity_max"])
+        tidx = np.array([type_pos[t] for t in part["type_names"]], dtype=np.int64)
+        out["type_counts"][np.ix_(idx, tidx)] += part["type_counts"]
+    return out
+
+
+def spatial_bins(df: pd.DataFrame, by: str = "grid", cell_deg: float = 2.0) -> pd.DataFrame:
+    """Roll events up per lat/lon grid cell (by="grid") or per country (by="country").
+
+    One row per non-empty bin: mean position, count, summed impact, max severity
+    and the most frequent event type. Large frames are binned per row partition
+    on the configured executor and merged.
+    """
+    p = map_reduce(
+        df, partial(_spatial_partial, by=by, cell_deg=cell_deg), _merge_spatial, columns=SPATIAL_COLUMNS
+    )
+    return spatial_table(p, by)
+
+
+def spatial_table(p: dict, by: str = "grid") -> pd.DataFrame:
+    """Bins frame of a (merged) spatial partial, e.g. one streamed from disk."""
+    count, severity_max = p["count"], p["severity_max"]
+
+    if len(p["type_names"]):
+        top_type = p["type_names"][p["type_counts"].argmax(axis=1)]
+    else:
+        top_type = np.full(len(count), "Unknown", dtype=object)
+
+    out = pd.DataFrame({
+        "latitude": p["lat_sum"] / count,
+        "longitude": p["lon_sum"] / count,
+        "events": count,
+        "impact_sum": p["impact_sum"],
+        "severity_max": np.where(np.isfinite(severity_max), severity_max, np.nan),
+        "top_event_type": top_type,
+    })
+    if by == "country":
+        out.insert(0, "country", p["keys"])
+    return out
+
+
+def grouped_quantiles(values: np.ndarray, starts: np.ndarray, sizes: np.ndarray, qs) -> np.ndarray:
+    """Linear-interpolated quantiles of contiguous sorted groups -> [group, q]."""
+    pos = starts[:, None] + np.asarray(qs)[None, :] * (sizes[:, None] - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, (starts + sizes - 1)[:, None])
+    frac = pos - lo
+    return values[lo] * (1 - frac) + values[hi] * frac
+
+
+class SeveritySummary:
+    """Per-severity box statistics and a binned Gaussian KDE of log10_impact."""
+
+    GRID_POINTS = 128
+    COLUMNS = ["severity", "log10_impact"]
+
+    def __init__(self, severities, stats, grid, density, sorted_rows=None):
+        self.severities = severities  # [S]
+        self.stats = stats            # DataFrame: n, min, q1, median, q3, max, lowerfence, upperfence
+        self.grid = grid              # [G] shared y grid
+        self.density = density        # [S, G], each row integrates to 1, 0 outside the span
+        self.sorted_rows = sorted_rows  # (severity, value) sorted by both; kept for merge
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SeveritySummary":
+        df = df[df["severity"].notna() & df["log10_impact"].notna()]
+        sev = df["severity"].to_numpy().astype(np.int64)
+        val = df["log10_impact"].to_numpy().astype(np.float64)
+
+        # Sort once by (severity, value): every group is a contiguous sorted run
+        order = np.lexsort((val, sev))
+        return cls._from_sorted(sev[order], val[order])
+
+    @classmethod
+    def merge(cls, a: "SeveritySummary", b: "SeveritySummary") -> "SeveritySummary":
+        # Insert the new sorted rows into the old sorted rows (no re-sort of history)
+        if b.sorted_rows is None or not len(b.sorted_rows[0]):
+            return a
+        if a.sorted_rows is None or not len(a.sorted_rows[0]):
+            return b
+        (sev_a, val_a), (sev_b, val_b) = a.sorted_rows, b.sorted_rows
+        # position of each new row = end of its severity's run of smaller-or-equal values
+        run_start = np.searchsorted(sev_a, sev_b, side="left")
+        run_end = np.searchsorted(sev_a, sev_b, side="right")
+        pos = np.empty(len(sev_b), dtype=np.int64)
+        for s in np.unique(sev_b):
+            sel = sev_b == s
+            lo, hi = run_start[sel][0], run_end[sel][0]
+            pos[sel] = lo + np.searchsorted(val_a[lo:hi], val_b[sel], side="right")
+        return cls._from_sorted(np.insert(sev_a, pos, sev_b), np.insert(val_a, pos, val_b))
+
+    @classmethod
+    def _from_sorted(cls, sev: np.ndarray, val: np.ndarray) -> "SeveritySummary":
+        val = val.astype(np.float64)
+        if len(val) == 0:
+            empty = pd.DataFrame(columns=["n", "min", "q1", "median", "q3", "max", "lowerfence", "upperfence"])
+            return cls(np.array([], dtype=np.int64), empty, np.array([]), np.zeros((0, 0)))
+
+        severities, starts, sizes = np.unique(sev, return_index=True, return_counts=True)
+
+        q = grouped_quantiles(val, starts, sizes, [0.0, 0.25, 0.5, 0.75, 1.0])
+        stats = pd.DataFrame(q, columns=["min", "q1", "median", "q3", "max"], index=severities)
+        stats.insert(0, "n", sizes)
+
+        # Tukey whiskers: most extreme values inside 1.5 * IQR
+        iqr = stats["q3"] - stats["q1"]
+        group = np.repeat(np.arange(len(severities)), sizes)
+        lo_fence = (stats["q1"] - 1.5 * iqr).to_numpy()[group]
+        hi_fence = (stats["q3"] + 1.5 * iqr).to_numpy()[group]
+        stats["lowerfence"] = pd.Series(np.where(val >= lo_fence, val, np.inf)).groupby(group).min().to_numpy()
+        stats["upperfence"] = pd.Series(np.where(val <= hi_fence, val, -np.inf)).groupby(group).max().to_numpy()
+
+        std = pd.Series(val).groupby(group).std(ddof=1).fillna(0).to_numpy()
+        grid, density = cls._density(stats, std, group, val)
+        return cls(severities, stats, grid, density, (sev.astype(np.int16), val.astype(np.float32)))
+
+    @classmethod
+    def from_histogram(cls, hist: "SeverityHistogram") -> "SeveritySummary":
+        """Approximate summary from binned counts: quantiles and fences within one bin width.
+
+        A quantile interpolates between the values at ranks floor(r) and ceil(r),
+        like the exact linear quantile, each placed inside its own bin; on discrete
+        data those two often sit in bins far apart.
+        """
+        keep = hist.counts.sum(axis=1) > 0
+        counts, severities = hist.counts[keep], hist.severities[keep]
+        if not len(severities):
+            return cls._from_sorted(np.array([], dtype=np.int64), np.array([]))
+
+        edges, centers = hist.EDGES, (hist.EDGES[:-1] + hist.EDGES[1:]) / 2
+        lo, hi = hist.lo[keep], hist.hi[keep]
+        sizes = counts.sum(axis=1)
+        cum = counts.cumsum(axis=1)
+
+        def value_at(rank):
+            # the value of integer rank `rank`, with a bin's values spread evenly inside it
+            b = np.array([np.searchsorted(c, r, side="right") for c, r in zip(cum, rank)])
+            rows = np.arange(len(b))
+            before = cum[rows, b] - counts[rows, b]
+            frac = (rank - before + 0.5) / counts[rows, b]
+            return np.clip(edges[b] + frac * (edges[b + 1] - edges[b]), lo, hi)
+
+        def quantile(q):
+            rank = q * (sizes - 1)
+            below = np.floor(rank)
+            v0, v1 = value_at(below), value_at(np.minimum(below + 1, sizes - 1))
+            return v0 + (rank - below) * (v1 - v0)
+
+        stats = pd.DataFrame({
+            "n": sizes,
+            "min": lo, "q1": quantile(0.25), "median": quantile(0.5), "q3": quantile(0.75), "max": hi,
+        }, index=severities)
+
+        # Whiskers: first / last occupied bin inside 1.5 * IQR
+        iqr = (stats["q3"] - stats["q1"]).to_numpy()
+        lo_fence, hi_fence = stats["q1"].to_numpy() - 1.5 * iqr, stats["q3"].to_numpy() + 1.5 * iqr
+        occupied = counts > 0
+        inner_lo = np.where(occupied & (centers >= lo_fence[:, None]), centers, np.inf).min(axis=1)
+        inner_hi = np.where(occupied & (centers <= hi_fence[:, None]), centers, -np.inf).max(axis=1)
+        stats["lowerfence"] = np.clip(np.minimum(inner_lo, hi), lo, hi)
+        stats["upperfence"] = np.clip(np.maximum(inner_hi, lo), lo, hi)
+
+        # Bin centers weighted by their counts stand in for the rows
+        group, bins = np.nonzero(counts)
+        weights = counts[group, bins].astype(np.float64)
+        mean = (counts * centers).sum(axis=1) / sizes
+        var = (counts * (centers - mean[:, None]) ** 2).sum(axis=1) / np.maximum(sizes - 1, 1)
+        grid, density = cls._density(stats, np.sqrt(var), group, centers[bins], weights)
+        return cls(severities, stats, grid, density)
+
+    @classmethod
+    def from_sketches(cls, sketches: dict) -> "SeveritySummary":
+        """Approximate summary from one quantile sketch per severity (see sketches.py)."""
+        sketches = {s: q for s, q in sketches.items() if q.n}
+        if not sketches:
+            return cls._from_sorted(np.array([], dtype=np.int64), np.array([]))
+
+        severities = np.array(list(sketches), dtype=np.int64)
+        q = np.stack([sk.quantiles([0.0, 0.25, 0.5, 0.75, 1.0]) for sk in sketches.values()])
+        stats = pd.DataFrame(q, columns=["min", "q1", "median", "q3", "max"], index=severities)
+        stats.insert(0, "n", [sk.n for sk in sketches.values()])
+
+        # Whiskers: most extreme retained samples inside 1.5 * IQR
+        iqr = (stats["q3"] - stats["q1"]).to_numpy()
+        items = [sk.items() for sk in sketches.values()]
+        lower, upper, std = [], [], []
+        for (values, weights), lo_f, hi_f, row in zip(
+            items, stats["q1"] - 1.5 * iqr, stats["q3"] + 1.5 * iqr, stats.itertuples()
+        ):
+            lower.append(max(values[values >= lo_f].min(initial=row.max), row.min))
+            upper.append(min(values[values <= hi_f].max(initial=row.min), row.max))
+            mean = np.average(values, weights=weights)
+            std.append(np.sqrt((weights * (values - mean) ** 2).sum() / max(row.n - 1, 1)))
+        stats["lowerfence"], stats["upperfence"] = lower, upper
+
+        # Retained samples weighted by what they stand for replace the rows in the KDE
+        group = np.concatenate([np.full(len(v), i) for i, (v, _) in enumerate(items)])
+        values = np.concatenate([v for v, _ in items])
+        weights = np.concatenate([w for _, w in items])
+        grid, density = cls._density(stats, np.array(std), group, values, weights)
+        return cls(severities, stats, grid, density)
+
+    @classmethod
+    def from_binned(cls, stats: pd.DataFrame, std: np.ndarray, counts: np.ndarray) -> "SeveritySummary":
+        """Summary from exact box statistics and per-severity counts of the values
+        binned on kde_grid(stats, std) ([S, G], nearest grid point), e.g. from SQL."""
+        group, bins = np.nonzero(counts)
+        grid, density = cls._density(
+            stats, std, group, cls.kde_grid(stats, std)[bins], counts[group, bins].astype(np.float64)
+        )
+        return cls(stats.index.to_numpy(), stats, grid, density)
+
+    @classmethod
+    def kde_grid(cls, stats: pd.DataFrame, std: np.ndarray) -> np.ndarray:
+        """Shared y grid covering every severity's "soft" span (data range +- 2 bandwidths)."""
+        bw = cls._bandwidth(stats, std)
+        return np.linspace((stats["min"].to_numpy() - 2 * bw).min(), (stats["max"].to_numpy() + 2 * bw).max(),
+                           cls.GRID_POINTS)
+
+    @staticmethod
+    def _bandwidth(stats: pd.DataFrame, std: np.ndarray) -> np.ndarray:
+        # Silverman bandwidth per severity (what plotly's violin uses)
+        iqr = (stats["q3"] - stats["q1"]).to_numpy()
+        spread = np.minimum(std, iqr / 1.349)
+        spread = np.where(spread > 0, spread, np.maximum(std, 1e-3))
+        return 0.9 * spread * stats["n"].to_numpy() ** -0.2
+
+    @classmethod
+    def _density(cls, stats: pd.DataFrame, std: np.ndarray, group, val, weights=None):
+        """Shared y grid and per-severity binned Gaussian KDE -> (grid, density [S, G])."""
+        n_groups = len(stats)
+        bw = cls._bandwidth(stats, std)
+        span_lo = stats["min"].to_numpy() - 2 * bw
+        span_hi = stats["max"].to_numpy() + 2 * bw
+        grid = cls.kde_grid(stats, std)
+        step = grid[1] - grid[0]
+
+        # Histogram on the grid, then smooth with a per-severity Gaussian kernel
+        bins = np.clip(np.rint((val - grid[0]) / step).astype(np.int64), 0, len(grid) - 1)
+        hist = np.bincount(group * len(grid) + bins, weights=weights, minlength=n_groups * len(grid))
+        hist = hist.reshape(n_groups, len(grid)).astype(np.float64)
+
+        diff = grid[:, None] - grid[None, :]
+        kernel = np.exp(-0.5 * (diff[None, :, :] / bw[:, None, None]) ** 2)
+        density = np.einsum("sg,sgh->sh", hist, kernel)
+        density /= density.sum(axis=1, keepdims=True) * step
+
+        inside = (grid[None, :] >= span_lo[:, None]) & (grid[None, :] <= span_hi[:, None])
+        return grid, np.where(inside, density, 0.0)
+
+
+class SeverityHistogram:
+    """Counts of log10_impact per severity on fixed bins, plus the exact min / max.
+
+    Its size does not depend on the number of rows and merge is a sum, so it can
+    be fed chunk by chunk from a file that doesn't fit in memory (see streaming.py).
+    """
+
+    # log10(million USD): 1 thousand USD .. 10 trillion USD, 0.005 wide bins
+    EDGES = np.linspace(-3.0, 7.0, 2001)
+    COLUMNS = ["severity", "log10_impact"]
+
+    def __init__(self, severities: np.ndarray, counts: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+        self.severities = severities  # [S]
+        self.counts = counts          # [S, B]
+        self.lo = lo                  # [S] exact min
+        self.hi = hi                  # [S] exact max
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SeverityHistogram":
+        df = df[df["severity"].notna() & df["log10_impact"].notna()]
+        sev = df["severity"].to_numpy().astype(np.int64)
+        val = df["log10_impact"].to_numpy().astype(np.float64)
+        severities, group = np.unique(sev, return_inverse=True)
+
+        n_bins = len(cls.EDGES) - 1
+        # out-of-range values land in the end bins; lo / hi keep them exact
+        bins = np.clip(np.searchsorted(cls.EDGES, val, side="right") - 1, 0, n_bins - 1)
+        counts = np.bincount(group * n_bins + bins, minlength=len(severities) * n_bins)
+
+        lo = np.full(len(severities), np.inf)
+        hi = np.full(len(severities), -np.inf)
+        np.minimum.at(lo, group, val)
+        np.maximum.at(hi, group, val)
+        return cls(severities, counts.reshape(len(severities), n_bins), lo, hi)
+
+    @classmethod
+    def merge(cls, a: "SeverityHistogram", b: "SeverityHistogram") -> "SeverityHistogram":
+        severities = np.union1d(a.severities, b.severities)
+        counts = np.zeros((len(severities), len(cls.EDGES) - 1), dtype=np.int64)
+        lo = np.full(len(severities), np.inf)
+        hi = np.full(len(severities), -np.inf)
+        for h in (a, b):
+            idx = np.searchsorted(severities, h.severities)
+            counts[idx] += h.counts
+            lo[idx] = np.minimum(lo[idx], h.lo)
+            hi[idx] = np.maximum(hi[idx], h.hi)
+        return cls(severities, counts, lo, hi)
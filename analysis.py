@@ -0,0 +1,139 @@
+# ---------------------------------------------------------
+# Severity -> impact trends and outliers (Severity page)
+# ---------------------------------------------------------
+# Trends are ordinary least squares of log10_impact on severity per event type
+# and per year. The fit only needs six sums per group, gathered with bincount
+# in one pass; the sums merge by addition, so they are built per partition and
+# updated on CSV appends like the other aggregates. Outliers are events whose
+# residual from their event type's trend is extreme within that type, by
+# robust z-score (median / MAD) or Tukey's IQR fences; grouped medians come
+# from one sort of all residuals.
+
+from imports import *
+from aggregates import grouped_quantiles
+
+# |robust z| above this is an outlier (Iglewicz & Hoaglin)
+ROBUST_Z = 3.5
+# beyond q1 - k * IQR / q3 + k * IQR
+IQR_K = 1.5
+
+
+def _groups(column: pd.Series) -> pd.Categorical:
+    # categorical columns already carry their codes; anything else is factorized once
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.array
+    return pd.Categorical(column)
+
+
+def _group_order(groups: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Order by (group, value) with one float argsort (cheaper than a two-key lexsort)."""
+    if not len(values):
+        return np.arange(0)
+    shifted = values - values.min()
+    return np.argsort(groups * (shifted.max() + 1.0) + shifted, kind="stable")
+
+
+class TrendSums:
+    """n, Σx, Σy, Σx², Σxy, Σy² of (severity, log10_impact) per event type and per year."""
+
+    BY = ["event_type", "year"]
+    SUMS = ["n", "sx", "sy", "sxx", "sxy", "syy"]
+    COLUMNS = ["severity", "log10_impact"] + BY
+
+    def __init__(self, table: pd.DataFrame):
+        self.table = table  # index (by, key), columns SUMS
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "TrendSums":
+        x = df["severity"].to_numpy(dtype=np.float64, na_value=np.nan)
+        y = df["log10_impact"].to_numpy(dtype=np.float64, na_value=np.nan)
+        keep = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[keep], y[keep]
+
+        parts = []
+        for by in cls.BY:
+            groups = _groups(df[by])
+            codes = groups.codes[keep].astype(np.int64)
+            n_groups = len(groups.categories)
+            sums = {
+                name: np.bincount(codes, weights=w, minlength=n_groups)
+                for name, w in zip(cls.SUMS, (None, x, y, x * x, x * y, y * y))
+            }
+            index = pd.MultiIndex.from_arrays(
+                [np.full(n_groups, by, dtype=object), np.asarray(groups.categories.astype(str), dtype=object)],
+                names=["by", "key"],
+            )
+            parts.append(pd.DataFrame(sums, index=index))
+        return cls(pd.concat(parts))
+
+    @classmethod
+    def merge(cls, a: "TrendSums", b: "TrendSums") -> "TrendSums":
+        return cls(a.table.add(b.table, fill_value=0))
+
+    def fit(self, by: str = "event_type") -> pd.DataFrame:
+        """Closed-form fit per group: n, slope, intercept, r2 (NaN where x doesn't vary)."""
+        t = self.table.xs(by, level="by")
+        n, sx, sy, sxx, sxy, syy = (t[c].to_numpy() for c in self.SUMS)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var_x = n * sxx - sx * sx
+            var_y = n * syy - sy * sy
+            cov = n * sxy - sx * sy
+            slope = np.where(var_x > 0, cov / var_x, np.nan)
+            intercept = np.where(var_x > 0, (sy - slope * sx) / n, sy / n)
+            r2 = np.where((var_x > 0) & (var_y > 0), cov * cov / (var_x * var_y), np.nan)
+        return pd.DataFrame(
+            {"n": n.astype(np.int64), "slope": slope, "intercept": intercept, "r2": r2}, index=t.index
+        )
+
+
+def find_outliers(df: pd.DataFrame, trends: pd.DataFrame, method: str = "robust_z") -> pd.DataFrame:
+    """Events whose residual from their event type's trend is extreme within that type.
+
+    `trends` is TrendSums.fit("event_type"). Returns the flagged rows (event_id,
+    country, event_type, year, severity, log10_impact, expected, score), most
+    extreme first; score is the robust z, or the distance past the fence in IQRs.
+    """
+    if method not in ("robust_z", "iqr"):
+        raise ValueError(f"method must be 'robust_z' or 'iqr', got {method!r}")
+
+    types = _groups(df["event_type"])
+    # codes -> position in the trends table (-1: a type the trends haven't seen)
+    to_trend = pd.Index(trends.index.astype(str)).get_indexer(types.categories.astype(str))
+    g = np.append(to_trend, -1)[types.codes]
+    x = df["severity"].to_numpy(dtype=np.float64, na_value=np.nan)
+    y = df["log10_impact"].to_numpy(dtype=np.float64, na_value=np.nan)
+    rows = np.flatnonzero(~(np.isnan(x) | np.isnan(y)) & (g >= 0))
+    g, x, y = g[rows], x[rows], y[rows]
+
+    # flat types (no slope) fall back to their mean
+    slope = np.nan_to_num(trends["slope"].to_numpy())
+    expected = trends["intercept"].to_numpy()[g] + slope[g] * x
+    resid = y - expected
+
+    # residuals sorted within each type: every type is a contiguous sorted run
+    order = _group_order(g, resid)
+    g_sorted = g[order]
+    types, starts, sizes = np.unique(g_sorted, return_index=True, return_counts=True)
+    row_group = np.searchsorted(types, g)
+
+    if method == "robust_z":
+        median = grouped_quantiles(resid[order], starts, sizes, [0.5])[:, 0]
+        dev = np.abs(resid - median[row_group])
+        dev_sorted = dev[_group_order(g, dev)]
+        mad = grouped_quantiles(dev_sorted, starts, sizes, [0.5])[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            score = 0.6745 * (resid - median[row_group]) / mad[row_group]
+        flagged = np.abs(score) > ROBUST_Z
+    else:
+        q1, q3 = grouped_quantiles(resid[order], starts, sizes, [0.25, 0.75]).T
+        iqr = (q3 - q1)[row_group]
+        lo, hi = q1[row_group] - IQR_K * iqr, q3[row_group] + IQR_K * iqr
+        with np.errstate(divide="ignore", invalid="ignore"):
+            score = np.where(resid < lo, (resid - lo) / iqr, np.where(resid > hi, (resid - hi) / iqr, 0.0))
+        flagged = (resid < lo) | (resid > hi)
+
+    flagged &= np.isfinite(score)
+    cols = [c for c in ("event_id", "country", "event_type", "year", "severity", "log10_impact") if c in df.columns]
+    # only the flagged rows are ever copied out of the frame
+    out = df[cols].iloc[rows[flagged]].assign(expected=expected[flagged], score=score[flagged])
+    return out.iloc[np.argsort(-np.abs(out["score"].to_numpy()), kind="stable")].reset_index(drop=True)
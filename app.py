@@ -1,9 +1,12 @@
 import streamlit as st
+import importlib
+import instrument
 
-# Import pages (each file exposes a function)
-from _1_temporal import show_temporal
-from _2_severity import show_severity
-from _3_worldmap import show_worldmap
+
+# Pages (each file exposes a function) are imported the first time they are
+# opened, so startup doesn't pay for pandas / plotly before a page needs them.
+def show_page(module: str, func: str):
+    getattr(importlib.import_module(module), func)()
 
 # -------------------------------------------------
 # Page config
@@ -29,37 +32,28 @@ page = st.sidebar.radio(
     ],
 )
 
+st.sidebar.checkbox(
+    "⏱ Instrumentation",
+    value=instrument.default_enabled(),
+    key=instrument.STATE_KEY,
+    help="Time each render stage (data, aggregation, figure, chart) and show it in a debug panel.",
+)
+
 # -------------------------------------------------
 # Routing
 # -------------------------------------------------
-if page == "🏠 Overview":
-    st.title("🌍 Climate Events Dashboard")
-
-    st.markdown(
-        """
-        This dashboard explores global climate events using three analytical tasks:
+instrument.begin(page)
 
-        ### 🕒 Task 1 — Temporal Patterns
-        Explore how the **frequency and composition** of climate events change
-        over time (yearly / monthly).
-
-        ### 💥 Task 2 — Severity vs Economic Impact
-        Analyze the **relationship between event severity and economic damage**,
-        identify trends and outliers.
-
-        ### 🗺️ Task 3 — World Map
-        Examine the **spatial distribution** of events worldwide, with filters
-        for time, event type, severity and impact.
-
-        👉 Use the **sidebar on the left** to navigate between tasks.
-        """
-    )
+if page == "🏠 Overview":
+    show_page("_0_overview", "show_overview")
 
 elif page == "🕒 Temporal Patterns":
-    show_temporal()
+    show_page("_1_temporal", "show_temporal")
 
 elif page == "💥 Severity vs Economic Impact":
-    show_severity()
+    show_page("_2_severity", "show_severity")
 
 elif page == "🗺️ World Map":
-    show_worldmap()
\ No newline at end of file
+    show_page("_3_worldmap", "show_worldmap")
+
+instrument.render_panel()
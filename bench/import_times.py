@@ -0,0 +1,80 @@
+# ---------------------------------------------------------
+# Import-time report for app startup and each page module
+# ---------------------------------------------------------
+# Uses `python -X importtime` in a fresh interpreter per target (best of N):
+#   startup : what app.py imports before any page is opened
+#   pages   : extra cost of importing a page module on first visit
+#
+#   python bench/import_times.py --repeat 5 --json bench/results/imports.json
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+STARTUP = ["streamlit", "instrument"]
+PAGES = ["_0_overview", "_1_temporal", "_2_severity", "_3_worldmap"]
+HEAVY = ["pandas", "numpy", "plotly", "pyarrow", "matplotlib"]
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _importtime(preload, target) -> dict:
+    """Cumulative microseconds per module imported by `import target` after `preload`."""
+    code = "".join(f"import {m}; " for m in preload) + f"import {target}"
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        raise SystemExit(out.stderr[-2000:])
+
+    # importtime reports the preload too: keep what came after its last top-level import
+    rows = [m.groups() for m in map(_LINE.match, out.stderr.splitlines()) if m]
+    if preload:
+        tops = [i for i, r in enumerate(rows) if r[2] == " " and r[3] == preload[-1]]
+        rows = rows[tops[-1] + 1:] if tops else rows
+    return {name: int(cumulative) for _, cumulative, _, name in rows}
+
+
+def measure(preload, target, repeat: int) -> dict:
+    runs = [_importtime(preload, target) for _ in range(repeat)]
+    best = min(runs, key=lambda r: r.get(target, float("inf")))
+    return {
+        "seconds": best.get(target, 0) / 1e6,
+        "heavy": {m: best[m] / 1e6 for m in HEAVY if m in best},
+    }
+
+
+def report(repeat: int) -> dict:
+    results = {"startup": {}, "pages": {}}
+    for m in STARTUP:
+        results["startup"][m] = measure(STARTUP[:STARTUP.index(m)], m, repeat)
+    for page in PAGES:
+        results["pages"][page] = measure(STARTUP, page, repeat)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure app / page import times.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    res = report(args.repeat)
+    total = sum(r["seconds"] for r in res["startup"].values())
+    print(f"startup (before any page): {total:.3f}s")
+    for m, r in res["startup"].items():
+        print(f"  {m:<14} {r['seconds']:.3f}s  {r['heavy']}")
+    print("first visit of a page (on top of startup):")
+    for m, r in res["pages"].items():
+        heavy = ", ".join(f"{k} {v:.3f}s" for k, v in r["heavy"].items())
+        print(f"  {m:<14} {r['seconds']:.3f}s  {heavy}")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(res, indent=2))
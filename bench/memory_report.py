@@ -0,0 +1,51 @@
+# ---------------------------------------------------------
+# Memory footprint of the events frame, before vs after compaction
+# ---------------------------------------------------------
+#   python bench/memory_report.py                      # the real CSV
+#   GC_CSV_PATH=/tmp/gc_1m.csv python bench/memory_report.py
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from imports import CSV_PATH, LOAD_END, in_window, read_gc_table  # noqa: E402
+from dataset import clean_event_label, prepare_frame  # noqa: E402
+
+
+def naive_frame(csv_path: Path) -> pd.DataFrame:
+    # What the pages used to hold: default read_csv dtypes + per-page object columns
+    df = pd.read_csv(csv_path)
+    df = in_window(df, None, LOAD_END).copy()
+    df["date"] = pd.to_datetime(dict(year=df["year"], month=df["month"], day=1))
+    df["event_type_clean"] = df["event_type"].map(clean_event_label)
+    df["severity_cat"] = df["severity"].astype(str)
+    df["log10_impact"] = np.log10(df["economic_impact_million_usd"].where(df["economic_impact_million_usd"] > 0))
+    return df
+
+
+def column_bytes(df: pd.DataFrame) -> pd.Series:
+    return df.memory_usage(deep=True, index=False)
+
+
+if __name__ == "__main__":
+    before = naive_frame(CSV_PATH)
+    after = prepare_frame(read_gc_table(CSV_PATH, None, LOAD_END))
+
+    table = pd.DataFrame({
+        "before_dtype": before.dtypes.astype(str),
+        "before_bytes": column_bytes(before),
+        "after_dtype": after.dtypes.astype(str),
+        "after_bytes": column_bytes(after),
+    })
+    table["ratio"] = (table["before_bytes"] / table["after_bytes"]).round(1)
+
+    pd.set_option("display.width", 140)
+    print(f"{CSV_PATH.name}: {len(after):,} rows")
+    print(table.to_string())
+    b, a = table["before_bytes"].sum(), table["after_bytes"].sum()
+    print(f"\ntotal: {b / 2**20:.2f} MB -> {a / 2**20:.2f} MB ({b / a:.1f}x smaller)")
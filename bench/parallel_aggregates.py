@@ -0,0 +1,71 @@
+# ---------------------------------------------------------
+# Partitioned aggregation: serial vs threads vs processes
+# ---------------------------------------------------------
+# Builds the temporal cube, severity summary and map bins with each executor
+# backend, checks the merged partials match the serial result and prints the
+# timings (best of --repeat).
+#
+#   GC_CSV_PATH=/tmp/gc_1m.csv python bench/parallel_aggregates.py --workers 8
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+import executor  # noqa: E402
+from dataset import get_prepared  # noqa: E402
+from aggregates import CountCube, SeveritySummary, spatial_bins  # noqa: E402
+
+TASKS = {
+    "temporal_cube": lambda f: executor.map_reduce(f, CountCube.from_frame, CountCube.merge, CountCube.COLUMNS),
+    "severity_summary": lambda f: executor.map_reduce(
+        f, SeveritySummary.from_frame, SeveritySummary.merge, SeveritySummary.COLUMNS
+    ),
+    "map_grid": lambda f: spatial_bins(f, by="grid", cell_deg=2.0),
+    "map_country": lambda f: spatial_bins(f, by="country"),
+}
+
+
+def same(a, b) -> bool:
+    if isinstance(a, CountCube):
+        return a.event_types == b.event_types and np.array_equal(a.counts, b.counts)
+    if isinstance(a, SeveritySummary):
+        return np.allclose(a.stats.to_numpy(float), b.stats.to_numpy(float)) and np.allclose(a.density, b.density)
+    # bins: same rows, order may differ after the merge
+    key = list(a.columns[:2])
+    a, b = (x.sort_values(key).reset_index(drop=True) for x in (a, b))
+    return a.equals(b) or np.allclose(a.select_dtypes("number"), b.select_dtypes("number"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the aggregation executors.")
+    parser.add_argument("--workers", type=int, default=executor.WORKERS)
+    parser.add_argument("--partition-rows", type=int, default=executor.PARTITION_ROWS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    executor.WORKERS = args.workers
+    executor.PARTITION_ROWS = args.partition_rows
+    frame = get_prepared().frame
+    parts = len(executor.row_partitions(len(frame)))
+    print(f"{len(frame):,} rows, {parts} partitions, {args.workers} workers")
+
+    reference = {name: task(frame) for name, task in TASKS.items()}
+    print(f"{'task':<18} " + " ".join(f"{k:>10}" for k in executor._KINDS))
+    for name, task in TASKS.items():
+        cells = []
+        for kind in executor._KINDS:
+            executor.EXECUTOR = kind
+            task(frame)  # warm the pool
+            best = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                out = task(frame)
+                best = min(best, time.perf_counter() - t0)
+            cells.append(f"{best:>9.3f}s" if same(reference[name], out) else f"{'MISMATCH':>10}")
+        print(f"{name:<18} " + " ".join(cells))
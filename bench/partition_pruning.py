@@ -0,0 +1,62 @@
+# ---------------------------------------------------------
+# Load cost vs time window on the partitioned store
+# ---------------------------------------------------------
+# Reads the typed table for windows of growing length (last N months of the
+# archive) and prints partitions opened, rows, frame size and load time. Each
+# window is checked against the same rows filtered out of the full CSV; exits
+# non-zero on a mismatch.
+#
+#   GC_CSV_PATH=/tmp/gc_1m.csv python bench/partition_pruning.py --months 1 12 24 60
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from imports import (  # noqa: E402
+    CSV_PATH, apply_schema, fresh_store, in_window, read_gc_table, store_partitions,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time windowed loads from the partitioned store.")
+    parser.add_argument("--months", type=int, nargs="+", default=[1, 12, 24, 60])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    full = apply_schema(pd.read_csv(CSV_PATH))
+    read_gc_table(CSV_PATH)  # builds the store if it is missing / stale
+    store = fresh_store(CSV_PATH)
+    if store is None:
+        raise SystemExit("no columnar store (parquet engine missing or read-only disk)")
+
+    newest = full.sort_values(["year", "month"]).iloc[-1]
+    last = pd.Period(year=int(newest["year"]), month=int(newest["month"]), freq="M")
+    print(f"{len(full):,} rows in {len(store_partitions(store))} partitions, archive ends {last}")
+    print(f"{'window':>19} {'parts':>6} {'rows':>10} {'MB':>8} {'load':>9}  check")
+
+    failures = []
+    for months in [None] + args.months:
+        start = None if months is None else str(last - months + 1)
+        end = None if months is None else str(last)
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            df = read_gc_table(CSV_PATH, start, end)
+            best = min(best, time.perf_counter() - t0)
+
+        ref = in_window(full, start, end)
+        ok = len(df) == len(ref) and set(df["event_id"]) == set(ref["event_id"])
+        label = "all" if months is None else f"{start}..{end}"
+        mb = df.memory_usage(deep=True).sum() / 2**20
+        print(f"{label:>19} {len(store_partitions(store, start, end)):>6} {len(df):>10,} "
+              f"{mb:>8.1f} {best:>8.3f}s  {'OK' if ok else 'MISMATCH'}")
+        if not ok:
+            failures.append(label)
+
+    if failures:
+        raise SystemExit("FAIL: " + ", ".join(failures))
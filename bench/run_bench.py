@@ -0,0 +1,204 @@
+# ---------------------------------------------------------
+# Headless benchmark of the dashboard pages
+# ---------------------------------------------------------
+# Generates synthetic data (bench/synth.py), then for every size runs the app
+# through Streamlit's AppTest in a fresh process and times:
+#   data   : cold load (CSV -> store -> prepared), load from the Parquet store
+#   pages  : first render + typical widget interactions
+#
+#   python bench/run_bench.py --rows 1000 100000 1000000 -o bench/results/today.json
+#   python bench/run_bench.py --rows 100000 --compare bench/results/before.json
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+APP = ROOT / "app.py"
+MARKER = "BENCH_JSON:"
+
+
+# -----------------------
+# Page scripts (what a user typically does)
+# -----------------------
+def _overview(at):
+    return [("rank_by_deaths", lambda: at.radio(key="overview_rank_by").set_value("deaths").run())]
+
+
+def _temporal(at):
+    return [
+        ("month_mode", lambda: at.radio(key="cmp_time_unit").set_value("Month").run()),
+        ("categories", lambda: at.radio(key="cmp_pick_by").set_value("Categories").run()),
+        ("normalize", lambda: at.radio(key="cmp_scale_mode").set_value("Normalize (%)").run()),
+        ("random_pick", lambda: at.button(key="cmp_random3").click().run()),
+        ("year_mode", lambda: at.radio(key="cmp_time_unit").set_value("Year").run()),
+    ]
+
+
+def _severity(at):
+    return [("rerun", lambda: at.run())]
+
+
+def _worldmap(at):
+    def month_range():
+        lo, hi = at.slider(key="map_month_range").value
+        return at.slider(key="map_month_range").set_value((lo, lo.replace(year=lo.year + 1))).run()
+
+    def webgl_points():
+        at.selectbox(key="map_detail").set_value("Points")
+        return at.selectbox(key="map_renderer").set_value("WebGL").run()
+
+    return [
+        ("color_event_type", lambda: at.selectbox(key="map_color_by").set_value("Event Type").run()),
+        ("size_none", lambda: at.selectbox(key="map_size_by").set_value("None").run()),
+        ("event_types", lambda: at.multiselect(key="map_event_types").set_value(["Flood", "Tornado"]).run()),
+        ("severity_range", lambda: at.slider(key="map_severity_range").set_value((3.0, 8.0)).run()),
+        ("month_range", month_range),
+        ("grid_cells", lambda: at.selectbox(key="map_detail").set_value("Grid cells").run()),
+        ("webgl_points", webgl_points),
+        ("density", lambda: at.selectbox(key="map_detail").set_value("Density").run()),
+        ("playback", lambda: at.toggle(key="map_playback").set_value(True).run()),
+    ]
+
+
+PAGES = {
+    "overview": ("🏠 Overview", _overview),
+    "temporal": ("🕒 Temporal Patterns", _temporal),
+    "severity": ("💥 Severity vs Economic Impact", _severity),
+    "worldmap": ("🗺️ World Map", _worldmap),
+}
+
+
+def _timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+# -----------------------
+# Worker: one dataset size, fresh interpreter (GC_CSV_PATH is read at import)
+# -----------------------
+def run_worker(rows: int, pages, timeout: float) -> list:
+    sys.path.insert(0, str(ROOT))
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    import imports
+    import dataset
+
+    results = []
+
+    def record(page, step, seconds, error=None):
+        results.append({"rows": rows, "page": page, "step": step, "seconds": round(seconds, 6), "error": error})
+
+    # Cold: no columnar store, no in-memory caches
+    for p in imports.STORE_DIR.glob(f"{imports.CSV_PATH.stem}.*"):
+        p.unlink()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    record("data", "cold_load", _timed(dataset.get_prepared))
+
+    # Store present, in-memory caches empty (a new replica)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    record("data", "store_load", _timed(dataset.get_prepared))
+
+    for name in pages:
+        label, script = PAGES[name]
+        at = AppTest.from_file(str(APP), default_timeout=timeout)
+        at.run()
+
+        steps = [("first_render", lambda: at.sidebar.radio[0].set_value(label).run())]
+        for step, action in steps + script(at):
+            try:
+                seconds = _timed(action)
+                errors = [str(e.value) for e in at.exception]
+                record(name, step, seconds, "; ".join(errors) or None)
+            except Exception as e:  # keep going: one broken step shouldn't hide the rest
+                record(name, step, float("nan"), repr(e))
+
+    return results
+
+
+# -----------------------
+# Driver
+# -----------------------
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(sizes, pages, data_dir: Path, timeout: float) -> dict:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from synth import write_csv
+
+    results = []
+    for rows in sizes:
+        csv = data_dir / f"gc_synth_{rows}.csv"
+        if not csv.exists():
+            print(f"generating {rows:,} rows -> {csv}", file=sys.stderr)
+            write_csv(rows, csv)
+
+        env = dict(os.environ, GC_CSV_PATH=str(csv))
+        cmd = [sys.executable, __file__, "--worker", "--rows", str(rows), "--timeout", str(timeout), "--pages", *pages]
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        lines = [l for l in out.stdout.splitlines() if l.startswith(MARKER)]
+        if not lines:
+            print(out.stderr[-2000:], file=sys.stderr)
+            raise SystemExit(f"benchmark worker failed for {rows} rows")
+        results += json.loads(lines[-1][len(MARKER):])
+        print(f"{rows:>10,} rows done", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict):
+    base = {(r["rows"], r["page"], r["step"]): r["seconds"] for r in baseline["results"]}
+    print(f"{'rows':>10}  {'page':<9} {'step':<17} {'base s':>9} {'now s':>9} {'ratio':>7}")
+    for r in current["results"]:
+        key = (r["rows"], r["page"], r["step"])
+        if key in base and base[key]:
+            print(f"{r['rows']:>10,}  {r['page']:<9} {r['step']:<17} {base[key]:>9.4f} {r['seconds']:>9.4f} "
+                  f"{r['seconds'] / base[key]:>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pages on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--data-dir", type=Path, default=ROOT / "bench" / "results" / "data")
+    parser.add_argument("-o", "--out", type=Path)
+    parser.add_argument("--compare", type=Path, help="previous results JSON to compare against")
+    parser.add_argument("--timeout", type=float, default=600.0, help="AppTest timeout per run (s)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(MARKER + json.dumps(run_worker(args.rows[0], args.pages, args.timeout)))
+        raise SystemExit(0)
+
+    report = run(args.rows, args.pages, args.data_dir, args.timeout)
+
+    out = args.out or ROOT / "bench" / "results" / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(out)
+
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text()))
@@ -0,0 +1,112 @@
+# ---------------------------------------------------------
+# Resident memory vs number of concurrent sessions
+# ---------------------------------------------------------
+# Opens N AppTest sessions in one process (like N browser tabs on one server),
+# keeps them all alive and records RSS after each one has rendered the pages.
+# The dataset is held once per process, so RSS should grow by per-session
+# widgets/figures only, not by another copy of the events frame.
+#
+#   python bench/session_memory.py --rows 500000 --sessions 8
+#
+# The first session pays one-off costs (aggregates, allocator arenas, lazy
+# imports), so growth is measured from the second session on. Exits non-zero
+# when the average growth per extra session exceeds --max-growth x the size of
+# the prepared frame.
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+APP = ROOT / "app.py"
+MARKER = "BENCH_JSON:"
+
+PAGES = ["🏠 Overview", "🕒 Temporal Patterns", "💥 Severity vs Economic Impact", "🗺️ World Map"]
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource  # peak, not current; still monotone enough for a trend
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_worker(sessions: int, timeout: float) -> dict:
+    sys.path.insert(0, str(ROOT))
+    from streamlit.testing.v1 import AppTest
+    import dataset
+
+    frame_bytes = int(dataset.get_prepared().frame.memory_usage(deep=True).sum())
+
+    alive, rss = [], []
+    for _ in range(sessions):
+        at = AppTest.from_file(str(APP), default_timeout=timeout)
+        at.run()
+        for page in PAGES:
+            at.sidebar.radio[0].set_value(page).run()
+            if at.exception:
+                raise SystemExit(f"{page}: {at.exception[0].value}")
+        alive.append(at)
+        gc.collect()
+        rss.append(rss_bytes())
+
+    return {"frame_bytes": frame_bytes, "rss": rss}
+
+
+def run(rows: int, sessions: int, data_dir: Path, timeout: float) -> dict:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from synth import write_csv
+
+    csv = data_dir / f"gc_synth_{rows}.csv"
+    if not csv.exists():
+        print(f"generating {rows:,} rows -> {csv}", file=sys.stderr)
+        write_csv(rows, csv)
+
+    # Fresh interpreter: GC_CSV_PATH is read at import and RSS starts clean
+    env = dict(os.environ, GC_CSV_PATH=str(csv))
+    cmd = [sys.executable, __file__, "--worker", "--sessions", str(sessions), "--timeout", str(timeout)]
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    lines = [l for l in out.stdout.splitlines() if l.startswith(MARKER)]
+    if not lines:
+        print(out.stderr[-2000:], file=sys.stderr)
+        raise SystemExit("session worker failed")
+    return json.loads(lines[-1][len(MARKER):])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure RSS as simulated sessions are added.")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--sessions", type=int, default=8, help="at least 3 for a warm slope")
+    parser.add_argument("--max-growth", type=float, default=0.25,
+                        help="allowed RSS growth per extra session, as a fraction of the frame size")
+    parser.add_argument("--data-dir", type=Path, default=ROOT / "bench" / "results" / "data")
+    parser.add_argument("--timeout", type=float, default=600.0, help="AppTest timeout per run (s)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(MARKER + json.dumps(run_worker(args.sessions, args.timeout)))
+        raise SystemExit(0)
+
+    res = run(args.rows, args.sessions, args.data_dir, args.timeout)
+    frame_mb = res["frame_bytes"] / 2**20
+    rss = [r / 2**20 for r in res["rss"]]
+
+    print(f"{args.rows:,} rows, prepared frame {frame_mb:.1f} MB")
+    print(f"{'sessions':>8} {'RSS MB':>9} {'delta MB':>9}")
+    for i, r in enumerate(rss, 1):
+        print(f"{i:>8} {r:>9.1f} {r - rss[0]:>9.1f}")
+
+    warm = rss[1:] if len(rss) > 2 else rss
+    per_session = (warm[-1] - warm[0]) / max(len(warm) - 1, 1)
+    limit = args.max_growth * frame_mb
+    print(f"\ngrowth per extra session: {per_session:.1f} MB (limit {limit:.1f} MB)")
+    if per_session > limit:
+        raise SystemExit("FAIL: memory grows with sessions like a per-session copy of the data")
+    print("OK: dataset is shared across sessions")
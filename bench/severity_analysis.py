@@ -0,0 +1,83 @@
+# ---------------------------------------------------------
+# Trend + outlier engine vs a per-group pandas reference
+# ---------------------------------------------------------
+# Fits severity -> log10_impact per event type / year from the bincount sums
+# and flags outliers (robust z and IQR) with the grouped sort, then does the
+# same with a groupby loop (np.polyfit, Series.median / quantile) and checks
+# they agree. Prints the timings of both. Exits non-zero on a mismatch.
+# tests/test_analysis.py runs the same comparison on the test data.
+#
+#   GC_CSV_PATH=/tmp/gc_1m.csv python bench/severity_analysis.py
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from analysis import IQR_K, ROBUST_Z, TrendSums, find_outliers  # noqa: E402
+from dataset import get_prepared  # noqa: E402
+
+
+def reference_fit(data: pd.DataFrame, by: str) -> pd.DataFrame:
+    return data.groupby(data[by].astype(str))[["severity", "log10_impact"]].apply(
+        lambda g: pd.Series(np.polyfit(g["severity"], g["log10_impact"], 1), index=["slope", "intercept"])
+    )
+
+
+def reference_outliers(data: pd.DataFrame, fit: pd.DataFrame, method: str) -> set:
+    et = data["event_type"].astype(str)
+    resid = data["log10_impact"] - (fit["intercept"].reindex(et).to_numpy()
+                                    + fit["slope"].reindex(et).to_numpy() * data["severity"])
+    flagged = []
+    for _, r in resid.groupby(et):
+        if method == "robust_z":
+            med = r.median()
+            z = 0.6745 * (r - med) / (r - med).abs().median()
+            flagged.append(r.index[z.abs() > ROBUST_Z])
+        else:
+            q1, q3 = r.quantile([0.25, 0.75])
+            iqr = q3 - q1
+            flagged.append(r.index[(r < q1 - IQR_K * iqr) | (r > q3 + IQR_K * iqr)])
+    return set(data.loc[np.concatenate(flagged), "event_id"])
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    frame = get_prepared().frame
+    data = frame[frame["severity"].notna() & frame["log10_impact"].notna()]
+    data = data.assign(severity=data["severity"].astype(float), log10_impact=data["log10_impact"].astype(float))
+    print(f"{len(data):,} rows with a positive impact")
+    print(f"{'check':<22} {'engine':>9} {'pandas':>9}  result")
+
+    failures = []
+    sums, t_sums = timed(lambda: TrendSums.from_frame(frame))
+    for by in TrendSums.BY:
+        fit, t_fit = timed(lambda: sums.fit(by))
+        ref, t_ref = timed(lambda: reference_fit(data, by))
+        ok = np.allclose(fit[["slope", "intercept"]].loc[ref.index], ref, atol=1e-9)
+        print(f"{'trend by ' + by:<22} {t_sums + t_fit:>8.3f}s {t_ref:>8.3f}s  {'OK' if ok else 'MISMATCH'}")
+        if not ok:
+            failures.append(f"trend {by}")
+
+    type_fit = sums.fit("event_type")
+    for method in ("robust_z", "iqr"):
+        out, t_out = timed(lambda: find_outliers(frame, type_fit, method))
+        ref, t_ref = timed(lambda: reference_outliers(data, type_fit, method))
+        ok = set(out["event_id"]) == ref
+        print(f"{'outliers ' + method:<22} {t_out:>8.3f}s {t_ref:>8.3f}s  "
+              f"{'OK' if ok else 'MISMATCH'} ({len(out):,} vs {len(ref):,})")
+        if not ok:
+            failures.append(f"outliers {method}")
+
+    if failures:
+        raise SystemExit("FAIL: " + ", ".join(failures))
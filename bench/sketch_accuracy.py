@@ -0,0 +1,98 @@
+# ---------------------------------------------------------
+# Quantile sketches vs exact quantiles
+# ---------------------------------------------------------
+# Builds the per (severity, year, event type) sketch cube for each target
+# error, both in one pass and incrementally (chunk by chunk, merged like CSV
+# appends), then checks the quartiles of every severity for the whole data and
+# for random year / event type selections against the exact values. The error
+# is a rank error: an estimate x is fine for quantile q if some copy of x sits
+# within q +- error in the sorted values (ties included). Exits non-zero when
+# any estimate is outside its bound.
+#
+#   GC_CSV_PATH=/tmp/gc_1m.csv python bench/sketch_accuracy.py --errors 0.05 0.01 0.002
+
+import argparse
+import sys
+import time
+from functools import reduce
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from dataset import get_prepared  # noqa: E402
+from sketches import SketchCube, k_for_error  # noqa: E402
+
+QS = np.array([0.25, 0.5, 0.75])
+
+
+def rank_error(sorted_values: np.ndarray, estimates: np.ndarray) -> float:
+    """Distance of the estimates' rank interval [left, right) to the target quantiles."""
+    n = len(sorted_values)
+    left = np.searchsorted(sorted_values, estimates, side="left") / n
+    right = np.searchsorted(sorted_values, estimates, side="right") / n
+    target = QS * (n - 1) / n
+    return float(np.maximum(np.maximum(left - target, target - right), 0).max())
+
+
+def selections(cube: SketchCube, count: int, rng) -> list:
+    years, types = cube.years(), cube.event_types()
+    out = [(None, None)]
+    for _ in range(count):
+        ys = list(rng.choice(years, rng.integers(1, len(years) + 1), replace=False))
+        ts = list(rng.choice(types, rng.integers(1, len(types) + 1), replace=False))
+        out.append((ys if rng.random() < 0.7 else None, ts if rng.random() < 0.7 else None))
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check sketch quantiles against exact ones.")
+    parser.add_argument("--errors", type=float, nargs="+", default=[0.05, 0.01, 0.002])
+    parser.add_argument("--selections", type=int, default=30)
+    parser.add_argument("--chunks", type=int, default=20, help="partitions for the incremental build")
+    parser.add_argument("--min-rows", type=int, default=50, help="skip smaller groups (quartiles are noise)")
+    args = parser.parse_args()
+
+    frame = get_prepared().frame
+    data = frame[frame["severity"].notna() & frame["log10_impact"].notna()]
+    sev = data["severity"].to_numpy().astype(np.int64)
+    year = data["year"].to_numpy().astype(np.int64)
+    etype = data["event_type"].astype(str).to_numpy()
+    val = data["log10_impact"].to_numpy().astype(np.float64)
+    print(f"{len(data):,} rows with a positive impact")
+    print(f"{'error':>7} {'k':>6} {'build':>8} {'cells':>6} {'samples':>8} {'worst':>8} {'incr.':>8}  check")
+
+    rng = np.random.default_rng(0)
+    failures = []
+    for error in args.errors:
+        k = k_for_error(error)
+        t0 = time.perf_counter()
+        cube = SketchCube.from_frame(data, k)
+        seconds = time.perf_counter() - t0
+        chunks = np.array_split(np.arange(len(data)), args.chunks)
+        incremental = reduce(SketchCube.merge, (SketchCube.from_frame(data.iloc[c], k) for c in chunks))
+
+        worst = {"once": 0.0, "incremental": 0.0}
+        for years, types in selections(cube, args.selections, rng):
+            keep = np.ones(len(data), dtype=bool)
+            if years is not None:
+                keep &= np.isin(year, years)
+            if types is not None:
+                keep &= np.isin(etype, types)
+            for name, c in (("once", cube), ("incremental", incremental)):
+                for s, sketch in c.by_severity(years, types).items():
+                    exact = np.sort(val[keep & (sev == s)])
+                    if len(exact) >= args.min_rows:
+                        worst[name] = max(worst[name], rank_error(exact, sketch.quantiles(QS)))
+
+        samples = sum(len(s) for s in cube.cells.values())
+        ok = max(worst.values()) <= error
+        print(f"{error:>7.3f} {k:>6} {seconds:>7.3f}s {len(cube.cells):>6} {samples:>8,} "
+              f"{worst['once']:>8.4f} {worst['incremental']:>8.4f}  {'OK' if ok else 'FAIL'}")
+        if not ok:
+            failures.append(f"{error:g}")
+
+    if failures:
+        raise SystemExit("FAIL: rank error above the bound for " + ", ".join(failures))
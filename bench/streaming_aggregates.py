@@ -0,0 +1,123 @@
+# ---------------------------------------------------------
+# Out-of-core aggregation: peak memory vs chunk size
+# ---------------------------------------------------------
+# Streams the events file through streaming.stream_aggregates with a few chunk
+# sizes, each in a fresh interpreter, and compares peak RSS with a full
+# in-memory load + build. The streamed aggregates are checked against the
+# in-memory ones: cube, rollup and bins exactly (up to float sums), the
+# histogram summary within one bin width. Exits non-zero on a mismatch.
+#
+#   python bench/synth.py 2000000 -o /tmp/gc_2m.csv
+#   GC_CSV_PATH=/tmp/gc_2m.csv python bench/streaming_aggregates.py --chunks 50000 200000
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+MARKER = "BENCH_JSON:"
+
+
+def peak_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(mode: str, chunk_rows: int, source: str) -> dict:
+    import numpy as np
+    import streaming
+    import imports
+
+    if source == "csv":
+        # pretend the store is missing so both modes parse the CSV
+        streaming.columnar_store = imports.columnar_store = imports.fresh_store = lambda *_: None
+
+    base = peak_mb()
+    t0 = time.perf_counter()
+    if mode == "stream":
+        out = streaming.stream_aggregates(imports.CSV_PATH, chunk_rows)
+    else:
+        from dataset import prepare_frame
+        frame = prepare_frame(imports.read_gc_table(imports.CSV_PATH, None, imports.LOAD_END))
+        out = {name: build(frame) for name, (build, _) in streaming.STREAMED.items()}
+    seconds = time.perf_counter() - t0
+
+    from aggregates import SeveritySummary, spatial_table
+    exact = SeveritySummary.from_frame(frame).stats if mode == "memory" else None
+    summary = SeveritySummary.from_histogram(out["severity_histogram"])
+    rollup = out["rollup"].table
+    rollup = rollup.astype({"country": str, "event_type": str}).sort_values(["country", "year", "month", "event_type"])
+    bins = {
+        by: spatial_table(out[f"map_bins:{by}"], by).sort_values(["latitude", "longitude"]).round(6)
+        for by in ("grid", "country")
+    }
+    return {
+        "seconds": seconds,
+        "peak_mb": peak_mb(),
+        "base_mb": base,
+        "cube": out["temporal_cube"].counts.tolist(),
+        "quantiles": summary.stats[["q1", "median", "q3"]].to_numpy().tolist(),
+        "rollup": rollup[["events", "deaths", "economic_impact_million_usd"]].to_numpy().tolist(),
+        "bins": {by: b[["events", "impact_sum"]].to_numpy().tolist() for by, b in bins.items()},
+        "exact_quantiles": None if exact is None else exact[["q1", "median", "q3"]].to_numpy().tolist(),
+        "rows": int(np.sum(out["temporal_cube"].counts)),
+    }
+
+
+def run(mode: str, chunk_rows: int, source: str) -> dict:
+    cmd = [sys.executable, __file__, "--worker", mode, "--chunk-rows", str(chunk_rows), "--source", source]
+    out = subprocess.run(cmd, capture_output=True, text=True)
+    lines = [l for l in out.stdout.splitlines() if l.startswith(MARKER)]
+    if not lines:
+        print(out.stderr[-2000:], file=sys.stderr)
+        raise SystemExit(f"{mode} worker failed")
+    return json.loads(lines[-1][len(MARKER):])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare streamed and in-memory aggregation.")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[50_000, 200_000])
+    parser.add_argument("--source", choices=["csv", "store"], default="csv")
+    parser.add_argument("--worker", choices=["stream", "memory"], help=argparse.SUPPRESS)
+    parser.add_argument("--chunk-rows", type=int, default=200_000, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(MARKER + json.dumps(run_worker(args.worker, args.chunk_rows, args.source)))
+        raise SystemExit(0)
+
+    import numpy as np
+    from aggregates import SeverityHistogram
+
+    ref = run("memory", 0, args.source)
+    bin_width = float(np.diff(SeverityHistogram.EDGES).max())
+    print(f"{ref['rows']:,} events, source: {args.source}")
+    print(f"{'mode':<16} {'time':>8} {'peak MB':>9} {'+MB':>8}  check")
+    print(f"{'in memory':<16} {ref['seconds']:>7.2f}s {ref['peak_mb']:>9.0f} {ref['peak_mb'] - ref['base_mb']:>8.0f}")
+
+    failures = []
+    err = np.abs(np.subtract(ref["quantiles"], ref["exact_quantiles"])).max()
+    print(f"histogram quartiles vs exact: max error {err:.4f} (bin width {bin_width:.4f})")
+    if err > bin_width:
+        failures.append("histogram quartiles")
+
+    for chunk in args.chunks:
+        res = run("stream", chunk, args.source)
+        ok = (
+            res["cube"] == ref["cube"]
+            and np.allclose(res["rollup"], ref["rollup"], rtol=1e-5)
+            and all(np.allclose(res["bins"][by], ref["bins"][by], rtol=1e-5) for by in ref["bins"])
+            and np.allclose(res["quantiles"], ref["quantiles"], atol=bin_width)
+        )
+        label = f"stream {chunk:,}"
+        print(f"{label:<16} {res['seconds']:>7.2f}s {res['peak_mb']:>9.0f} "
+              f"{res['peak_mb'] - res['base_mb']:>8.0f}  {'OK' if ok else 'MISMATCH'}")
+        if not ok:
+            failures.append(label)
+
+    if failures:
+        raise SystemExit("FAIL: " + ", ".join(failures))
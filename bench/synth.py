@@ -0,0 +1,87 @@
+# ---------------------------------------------------------
+# Synthetic climate events with the schema of the real CSV
+# ---------------------------------------------------------
+# python bench/synth.py 1000000 -o /tmp/gc_1m.csv
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+COUNTRIES = [
+    "Argentina", "Australia", "Austria", "Bangladesh", "Belgium", "Brazil", "Canada", "Chile",
+    "China", "Colombia", "Czech Republic", "Denmark", "Egypt", "Finland", "France", "Germany",
+    "Greece", "Hungary", "India", "Indonesia", "Iraq", "Ireland", "Israel", "Italy", "Japan",
+    "Kazakhstan", "Malaysia", "Mexico", "Netherlands", "New Zealand", "Nigeria", "Pakistan",
+    "Peru", "Philippines", "Poland", "Portugal", "Qatar", "Romania", "Russia", "Saudi Arabia",
+    "Singapore", "South Africa", "South Korea", "Sweden", "Switzerland", "Thailand", "Turkey",
+    "UAE", "United Kingdom", "United States", "Vietnam",
+]
+
+EVENT_TYPES = [
+    "Cold Wave", "Drought", "Earthquake", "Flood", "Hailstorm", "Heatwave", "Hurricane",
+    "Landslide", "Tornado", "Tsunami", "Volcanic Eruption", "Wildfire",
+]
+
+# 2020-01 .. 2025-09, like the real feed (2025 is partial)
+FIRST_MONTH = pd.Period("2020-01", freq="M")
+N_MONTHS = 69
+
+
+def generate(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    month_no = np.sort(rng.integers(0, N_MONTHS, n_rows))
+    year = 2020 + month_no // 12
+    month = month_no % 12 + 1
+    day = rng.integers(1, 29, n_rows)
+    date = pd.to_datetime(dict(year=year, month=month, day=day))
+
+    severity = rng.choice(np.arange(1, 10), n_rows, p=[.07, .1, .13, .14, .14, .14, .13, .1, .05])
+    affected = rng.lognormal(12, 1.6, n_rows).astype(np.int64) + 600
+    deaths = rng.poisson(severity * 1.0)
+    injuries = rng.poisson(severity * 8.0)
+    # impact grows with severity; ~10% zero like the real data
+    impact = np.round(rng.lognormal(-4 + 0.45 * severity, 1.4) * (rng.random(n_rows) > 0.1), 2)
+    aid = np.round(np.where(rng.random(n_rows) < 0.02, impact * rng.random(n_rows), 0.0), 2)
+
+    df = pd.DataFrame({
+        "event_id": [f"EV{i:05d}" for i in range(1, n_rows + 1)],
+        "date": date.dt.strftime("%Y-%m-%d"),
+        "year": year,
+        "month": month,
+        "country": rng.choice(COUNTRIES, n_rows),
+        "event_type": rng.choice(EVENT_TYPES, n_rows),
+        "severity": severity,
+        "duration_days": rng.geometric(0.12, n_rows) - 1,
+        "affected_population": affected,
+        "deaths": deaths,
+        "injuries": injuries,
+        "economic_impact_million_usd": impact,
+        "infrastructure_damage_score": np.round(rng.gamma(2.0, 7.5, n_rows) + 0.2, 1),
+        "response_time_hours": rng.poisson(11, n_rows),
+        "international_aid_million_usd": aid,
+        "latitude": np.round(rng.uniform(-90, 90, n_rows), 4),
+        "longitude": np.round(rng.uniform(-180, 180, n_rows), 4),
+        "total_casualties": deaths + injuries,
+        "impact_per_capita": np.round(impact * 1e6 / affected, 2),
+        "aid_percentage": np.round(np.where(impact > 0, aid / np.maximum(impact, 1e-9) * 100, 0.0), 1),
+    })
+    return df
+
+
+def write_csv(n_rows: int, path: Path, seed: int = 0) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    generate(n_rows, seed).to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic climate events CSV.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("-o", "--out", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(write_csv(args.rows, args.out, args.seed))
@@ -0,0 +1,299 @@
+# ---------------------------------------------------------
+# Prepared dataset shared by all pages
+# ---------------------------------------------------------
+# read_gc_table() gives the typed table; this layer adds the derived columns the
+# pages need (clean labels, month start, log10 impact, ...) once per data
+# version and keeps the result in a process-wide resource cache.
+# Pages ask for views; with copy-on-write on, anything a page derives from a
+# view is copied lazily and never touches the shared frame.
+
+from imports import *
+from executor import map_reduce
+import duckdb_backend
+from aggregates import RollupCube
+import threading
+
+
+def clean_event_label(raw) -> str:
+    # "volcanic_eruption" -> "Volcanic Eruption"
+    return str(raw).replace("_", " ").title()
+
+
+def prepare_frame(gc: pd.DataFrame) -> pd.DataFrame:
+    # Every page is time-based, so rows without year/month are dropped here once
+    df = gc.dropna(subset=["year", "month"])
+    df["year"] = df["year"].astype("int16")
+    df["month"] = df["month"].astype("int8")
+
+    # Monthly time key (the event's own date stays in "date")
+    df["month_start"] = pd.to_datetime(dict(year=df["year"], month=df["month"], day=1), errors="coerce")
+
+    # Clean labels share the category codes of event_type (no extra strings per row)
+    if "event_type" in df.columns:
+        et = df["event_type"].astype("category")
+        df["event_type"] = et
+        df["event_type_clean"] = et.cat.rename_categories(
+            [clean_event_label(c) for c in et.cat.categories]
+        )
+    else:
+        df["event_type_clean"] = pd.Categorical(["Unknown"] * len(df))
+
+    # log10 of economic impact (positive values only)
+    impact = pd.to_numeric(df["economic_impact_million_usd"], errors="coerce")
+    df["log10_impact"] = np.log10(impact.where(impact > 0)).astype("float32")
+
+    df["has_coords"] = df["latitude"].notna() & df["longitude"].notna()
+
+    # Kept sorted by month so time ranges are contiguous row ranges (see month_slice)
+    return df.sort_values("month_start", kind="stable").reset_index(drop=True)
+
+
+def month_bounds(frame: pd.DataFrame):
+    """(month starts, row offsets + end sentinel) of a month-sorted frame."""
+    dates = frame["month_start"].to_numpy()
+    months, offsets = np.unique(dates, return_index=True)
+    return months, np.append(offsets, len(dates))
+
+
+def month_slice(df: pd.DataFrame, start, end) -> pd.DataFrame:
+    """Rows with start <= month_start <= end of a month-sorted frame, as a zero-copy slice.
+
+    The prepared frame is sorted by month_start and boolean filtering keeps that
+    order, so any filtered view of it can be sliced with a binary search.
+    """
+    dates = df["month_start"].to_numpy()
+    lo = dates.searchsorted(np.datetime64(pd.Timestamp(start)), side="left")
+    hi = dates.searchsorted(np.datetime64(pd.Timestamp(end)), side="right")
+    return df.iloc[lo:hi]
+
+
+class BitmapIndex:
+    """One packed bitmap (1 bit per row) per value of a categorical column.
+
+    Multi-select filters are ORs of bitmaps and combined filters ANDs, so the
+    cost is n/8 bytes per operation whatever the width of the strings.
+    """
+
+    def __init__(self, column: pd.Series):
+        cat = column.astype("category")
+        codes = cat.cat.codes.to_numpy()
+        self.n_rows = len(codes)
+        self.values = list(cat.cat.categories)
+        self.position = {v: i for i, v in enumerate(self.values)}
+        self.bits = np.stack(
+            [np.packbits(codes == k) for k in range(len(self.values))]
+        ) if self.values else np.zeros((0, (self.n_rows + 7) // 8), dtype=np.uint8)
+
+    def select(self, values) -> np.ndarray:
+        rows = [self.position[v] for v in values if v in self.position]
+        if not rows:
+            return np.zeros(self.bits.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bits[rows], axis=0)
+
+
+
+def unpack_mask(bits: np.ndarray, n_rows: int) -> np.ndarray:
+    return np.unpackbits(bits, count=n_rows).view(bool)
+
+
+def _align_categories(a: pd.Series, b: pd.Series):
+    cats = a.cat.categories.union(b.cat.categories)
+    return a.cat.set_categories(cats), b.cat.set_categories(cats)
+
+
+def _common_event_ids(a: pd.Series, b: pd.Series):
+    """Both id columns as ints, or both as the text ids when one side doesn't round-trip as ints."""
+    if pd.api.types.is_integer_dtype(a) == pd.api.types.is_integer_dtype(b):
+        return a, b
+    return tuple(
+        s.map(format_event_id).astype("category") if pd.api.types.is_integer_dtype(s) else s
+        for s in (a, b)
+    )
+
+
+def _append_rows(frame: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """Concat prepared frames, keeping categoricals categorical and the month order."""
+    frame, rows = frame.copy(deep=False), rows[frame.columns]
+    if "event_id" in frame.columns:
+        frame["event_id"], rows["event_id"] = _common_event_ids(frame["event_id"], rows["event_id"])
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col], rows[col] = _align_categories(frame[col], rows[col])
+
+    out = pd.concat([frame, rows], ignore_index=True)
+    if len(frame) and len(rows) and rows["month_start"].min() < frame["month_start"].iloc[-1]:
+        # late events: re-establish the month order month_slice relies on
+        out = out.sort_values("month_start", kind="stable").reset_index(drop=True)
+    return out
+
+
+class PreparedData:
+    def __init__(self, version: str, frame: pd.DataFrame, offset: int = 0, columns=None, start=LOAD_START):
+        self.version = version
+        self.frame = frame
+        # First month held in the frame (None: from the start of the archive)
+        self.start = start
+        # Where the CSV was read up to, and its raw header (for incremental appends)
+        self.offset = offset
+        self.columns = columns
+        self.marker = csv_marker(CSV_PATH, offset) if offset else None
+        self._aggregates = {}
+        self._builders = {}
+        self._merges = {}
+        # Aggregates over the whole archive rather than the frame (see seed)
+        self._history = set()
+        self._lock = threading.RLock()
+
+    def aggregate(self, name: str, build, merge=None, query=None, columns=None):
+        """Derived structure memoised on the dataset, i.e. once per data version.
+
+        `merge(old, partial)` makes it incremental: on append the new rows are
+        built on their own and merged in instead of rebuilding from history.
+        The same merge lets a large frame be built per row partition in parallel;
+        `columns` (what build reads) keeps the partitions sent to workers narrow.
+        `query()` builds the same structure with the SQL backend when it is on
+        (GC_BACKEND=duckdb); appends still go through build + merge, and without
+        a merge the next version queries it again.
+        """
+        with self._lock:
+            if name not in self._aggregates:
+                if query is not None and duckdb_backend.enabled():
+                    self._aggregates[name] = query()
+                elif merge is not None:
+                    self._aggregates[name] = map_reduce(self.frame, build, merge, columns)
+                else:
+                    self._aggregates[name] = build(self.frame)
+                self._builders[name] = build
+                if merge is not None:
+                    self._merges[name] = merge
+            return self._aggregates[name]
+
+    def seed(self, name: str, value, build, merge=None):
+        """Install an aggregate built elsewhere (e.g. streamed from disk) as if aggregate() had built it.
+
+        Seeded aggregates cover the archive up to LOAD_END, also months before
+        the frame's start, and appends merge every new row into them.
+        """
+        with self._lock:
+            self._history.add(name)
+            self._aggregates[name] = value
+            self._builders[name] = build
+            if merge is not None:
+                self._merges[name] = merge
+
+    @property
+    def windowed(self) -> bool:
+        """Whether the frame holds fewer months than the seeded history (from `start` on)."""
+        return bool(self._history) and self.start is not None
+
+    def index(self, column: str) -> BitmapIndex:
+        return self.aggregate(f"bitmap:{column}", lambda f: BitmapIndex(f[column]))
+
+    def rollup(self) -> RollupCube:
+        # country x year x month x event_type sums; merged on append
+        return self.aggregate(
+            "rollup", RollupCube.from_frame, RollupCube.merge, duckdb_backend.rollup, RollupCube.COLUMNS
+        )
+
+    def event_positions(self, ids) -> np.ndarray:
+        """Row positions of the given event ids, in frame order (unknown ids are skipped)."""
+        ids = pd.Series(ids)
+        if pd.api.types.is_integer_dtype(ids) and not pd.api.types.is_integer_dtype(self.frame["event_id"]):
+            # a subset can round-trip as ints where the whole column didn't
+            ids = ids.map(format_event_id)
+        index = self.aggregate("event_id_index", lambda f: pd.Index(f["event_id"]))
+        pos = index.get_indexer_for(ids)
+        return np.sort(pos[pos >= 0])
+
+    def rows_by_event_id(self, ids) -> pd.DataFrame:
+        """Rows for the given event ids (unknown ids are skipped)."""
+        return self.frame.iloc[self.event_positions(ids)]
+
+    def view(self, columns=None) -> pd.DataFrame:
+        # Lazy copy: shares memory until the caller writes to it
+        if columns is None:
+            return self.frame.copy(deep=False)
+        return self.frame[[c for c in columns if c in self.frame.columns]]
+
+    def can_append(self, size: int) -> bool:
+        return bool(self.offset) and size > self.offset and csv_marker(CSV_PATH, self.offset) == self.marker
+
+    def appended(self, version: str) -> "PreparedData":
+        """New dataset = this one + rows appended to the CSV since it was read."""
+        raw, offset = read_appended_rows(CSV_PATH, self.offset, self.columns)
+        # streamed aggregates take rows from before the frame's window too
+        start = None if self._history else LOAD_START
+        rows = prepare_frame(in_window(raw, start, LOAD_END))
+
+        # event_id is the natural key: drop repeats and events we already hold
+        # (with a streamed history, only the frame's months are held to compare with)
+        if "event_id" in rows.columns:
+            rows = rows.drop_duplicates("event_id")
+            held, ids = _common_event_ids(self.frame["event_id"], rows["event_id"])
+            rows = rows[~ids.isin(held)]
+        recent = in_window(rows, self.start, None)
+
+        # Only the merged aggregates carry over: row-position structures (bitmaps, month
+        # offsets, filter caches) and what is derived from other aggregates are rebuilt lazily,
+        # also when every new row is older than the frame (a streamed history still took them)
+        frame = _append_rows(self.frame, recent) if len(recent) else self.frame
+        data = PreparedData(version, frame, offset, self.columns, self.start)
+        data._history = set(self._history)
+        with self._lock:
+            for name, merge in self._merges.items():
+                part = rows if name in self._history else recent
+                build = self._builders[name]
+                data._aggregates[name] = self._aggregates[name]
+                if len(part):
+                    data._aggregates[name] = merge(self._aggregates[name], build(part))
+                data._builders[name] = build
+                data._merges[name] = merge
+        return data
+
+
+def _full_load(version: str, start=LOAD_START) -> PreparedData:
+    size = csv_signature(CSV_PATH)["size"]
+    columns = pd.read_csv(CSV_PATH, nrows=0).columns.tolist()
+    # Straight from the store: the typed table is dropped once the prepared frame exists
+    # Only the partitions inside the load window are opened
+    gc = read_gc_table(CSV_PATH, start, LOAD_END)
+    return PreparedData(version, prepare_frame(gc), size, columns, start)
+
+
+@st.cache_resource(show_spinner=False)
+def _dataset_slot() -> dict:
+    # One live dataset per process; replaced (or extended) when the CSV changes
+    return {"data": None, "lock": threading.Lock()}
+
+
+def get_prepared() -> PreparedData:
+    slot = _dataset_slot()
+    version = data_version()
+    data = slot["data"]
+    if data is not None and data.version == version:
+        return data
+
+    with slot["lock"]:
+        data = slot["data"]
+        if data is None or data.version != version:
+            # History aggregates from the out-of-core pass (streaming imports this module)
+            import streaming
+            size = csv_signature(CSV_PATH)["size"]
+            if data is not None and data.can_append(size):
+                data = data.appended(version)
+            elif streaming.enabled():
+                # the history pages read the streamed aggregates: only recent months are held as rows
+                history = streaming.cached_aggregates(CSV_PATH)
+                data = _full_load(version, streaming.frame_start(history))
+                streaming.attach(data, history)
+            else:
+                # also with GC_BACKEND=duckdb: the map, sketches, trends and outliers are built from rows
+                data = _full_load(version)
+            # Categorical filter indexes are built with the data, not on first click
+            for col in ("event_type", "country"):
+                if col in data.frame.columns:
+                    data.index(col)
+            # ... and so is the rollup behind the Overview KPIs
+            data.rollup()
+            slot["data"] = data
+        return data
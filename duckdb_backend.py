@@ -0,0 +1,231 @@
+# ---------------------------------------------------------
+# Optional DuckDB backend (GC_BACKEND=duckdb, `pip install duckdb`)
+# ---------------------------------------------------------
+# The page aggregates written as SQL over the Parquet store (or the CSV when
+# the store is missing / stale) and run by an in-process DuckDB: vectorized,
+# multi-threaded, reads only the referenced columns and pushes the filters
+# into the scan. Results are returned as the same aggregate objects as the
+# pandas path (see PreparedData.aggregate(..., query=...)), so pages don't
+# care which one built them. The World Map filters go through filter_events,
+# mapped back to rows of the prepared frame by event_id.
+# tests/test_duckdb_backend.py checks both backends agree.
+#
+# Only these aggregates skip pandas: the prepared frame is still loaded next to
+# the engine (the map points, sketches, trends and outliers are built from its
+# rows), so the backend alone doesn't make an archive larger than memory fit.
+# GC_STREAMING=1 does, by holding only the recent months as rows.
+
+from imports import *
+import importlib.util
+import threading
+from aggregates import CountCube, RollupCube, SeveritySummary
+from executor import WORKERS
+
+BACKEND = os.environ.get("GC_BACKEND", "pandas").lower()
+
+# What the load window and prepare_frame keep
+MONTH_KEY = "(CAST(year AS INTEGER) * 12 + CAST(month AS INTEGER) - 1)"
+BASE_FILTER = " AND ".join(
+    ["year IS NOT NULL AND month IS NOT NULL"]
+    + ([f"{MONTH_KEY} >= {parse_month(LOAD_START)}"] if LOAD_START else [])
+    + ([f"{MONTH_KEY} <= {parse_month(LOAD_END)}"] if LOAD_END else [])
+)
+
+_local = threading.local()
+# csv path -> (CSV signature, thread rebuilding its store)
+_rebuilds = {}
+_rebuilds_lock = threading.Lock()
+
+
+def available() -> bool:
+    # duckdb is only imported once a query runs: the pandas path never pays for it
+    return importlib.util.find_spec("duckdb") is not None
+
+
+def enabled() -> bool:
+    # optional dependency: stay on pandas when it isn't installed
+    return BACKEND == "duckdb" and available()
+
+
+@st.cache_resource(show_spinner=False)
+def _database():
+    import duckdb
+
+    con = duckdb.connect(":memory:")
+    con.execute(f"SET threads TO {WORKERS}")
+    return con
+
+
+def _cursor():
+    # DuckDB connections aren't shared across threads: one cursor per thread
+    if getattr(_local, "cursor", None) is None:
+        _local.cursor = _database().cursor()
+    return _local.cursor
+
+
+def rebuild_store(csv_path: Path = CSV_PATH) -> threading.Thread:
+    """Rebuild the stale store of the CSV in the background, once per CSV version (e.g. after an append)."""
+    sig = csv_signature(csv_path)
+    with _rebuilds_lock:
+        running = _rebuilds.get(str(csv_path))
+        if running is None or running[0] != sig:
+            thread = threading.Thread(target=columnar_store, args=(csv_path,), name="store-rebuild", daemon=True)
+            _rebuilds[str(csv_path)] = running = sig, thread
+            thread.start()
+        return running[1]
+
+
+def source(csv_path: Path = CSV_PATH, start=None, end=None) -> str:
+    """FROM clause for the events: the store partitions in the load window when fresh, otherwise the CSV.
+
+    `start` / `end` narrow the partitions further (the WHERE clause still applies).
+    A stale store is rebuilt in the background; queries scan the CSV until it is done.
+    """
+    store = fresh_store(csv_path)
+    if store is None:
+        rebuild_store(csv_path)
+    else:
+        files = store_partitions(store, LOAD_START, LOAD_END)
+        if start is not None or end is not None:
+            wanted = set(store_partitions(store, start, end))
+            files = [f for f in files if f in wanted]
+        if files:
+            paths = ", ".join(f"'{f.as_posix()}'" for f in files)
+            return f"read_parquet([{paths}], hive_partitioning = false)"
+    # the store is de-duplicated when written; the CSV keeps the first row of each event_id
+    return f"""(
+        SELECT * EXCLUDE (_row) FROM (
+            SELECT *, row_number() OVER () AS _row
+            FROM read_csv('{Path(csv_path).as_posix()}', header = true)
+        )
+        QUALIFY row_number() OVER (PARTITION BY event_id ORDER BY _row) = 1
+    )"""
+
+
+def query(sql: str, params=None) -> pd.DataFrame:
+    return _cursor().execute(sql, params or []).df()
+
+
+# -----------------------
+# Aggregates
+# -----------------------
+def count_cube(csv_path: Path = CSV_PATH) -> CountCube:
+    long = query(f"""
+        SELECT CAST(year AS INTEGER) AS year, CAST(month AS INTEGER) AS month,
+               CAST(event_type AS VARCHAR) AS event_type, count(*) AS n
+        FROM {source(csv_path)}
+        WHERE {BASE_FILTER} AND event_type IS NOT NULL
+        GROUP BY ALL
+    """)
+    event_types = sorted(long["event_type"].unique().tolist())
+    if long.empty:
+        return CountCube(np.array([], dtype=int), event_types, np.zeros((0, 12, 0), dtype=np.int64))
+
+    y0 = int(long["year"].min())
+    years = np.arange(y0, int(long["year"].max()) + 1)
+    counts = np.zeros((len(years), 12, len(event_types)), dtype=np.int64)
+    types = pd.Categorical(long["event_type"], categories=event_types).codes
+    counts[long["year"].to_numpy() - y0, long["month"].to_numpy() - 1, types] = long["n"].to_numpy()
+    return CountCube(years, event_types, counts)
+
+
+def rollup(csv_path: Path = CSV_PATH) -> RollupCube:
+    sums = ",\n".join(f"sum(coalesce(CAST({m} AS FLOAT), 0)) AS {m}" for m in RollupCube.MEASURES)
+    table = query(f"""
+        SELECT CAST(country AS VARCHAR) AS country, CAST(year AS SMALLINT) AS year,
+               CAST(month AS TINYINT) AS month, CAST(event_type AS VARCHAR) AS event_type,
+               count(*) AS events,
+               {sums}
+        FROM {source(csv_path)}
+        WHERE {BASE_FILTER}
+        GROUP BY ALL
+        ORDER BY ALL
+    """)
+    for k in ("country", "event_type"):
+        table[k] = table[k].astype("category")
+    return RollupCube(table)
+
+
+def severity_summary(csv_path: Path = CSV_PATH) -> SeveritySummary:
+    # Box statistics with quantile_cont, then a histogram on the summary's KDE grid:
+    # two aggregations in the engine, no rows come back
+    events = f"""
+        SELECT CAST(severity AS BIGINT) AS severity,
+               -- same float32 log10 as prepare_frame
+               CAST(CAST(log10(CAST(economic_impact_million_usd AS FLOAT)) AS FLOAT) AS DOUBLE) AS value
+        FROM {source(csv_path)}
+        WHERE {BASE_FILTER} AND severity IS NOT NULL AND economic_impact_million_usd > 0
+    """
+    box = query(f"""
+        WITH events AS ({events}),
+        box AS (
+            SELECT severity, count(*) AS n, min(value) AS min,
+                   quantile_cont(value, 0.25) AS q1, quantile_cont(value, 0.5) AS median,
+                   quantile_cont(value, 0.75) AS q3, max(value) AS max,
+                   coalesce(stddev_samp(value), 0) AS std
+            FROM events
+            GROUP BY severity
+        )
+        -- Tukey whiskers: most extreme values inside 1.5 * IQR
+        SELECT box.*,
+               min(value) FILTER (WHERE value >= q1 - 1.5 * (q3 - q1)) AS lowerfence,
+               max(value) FILTER (WHERE value <= q3 + 1.5 * (q3 - q1)) AS upperfence
+        FROM box JOIN events USING (severity)
+        GROUP BY ALL
+        ORDER BY severity
+    """)
+    if box.empty:
+        return SeveritySummary._from_sorted(np.array([], dtype=np.int64), np.array([]))
+
+    stats = box.set_index("severity")[["n", "min", "q1", "median", "q3", "max", "lowerfence", "upperfence"]]
+    stats.index.name = None
+    std = box["std"].to_numpy()
+    grid = SeveritySummary.kde_grid(stats, std)
+    step = grid[1] - grid[0]
+    counts = query(f"""
+        SELECT severity, CAST(least(greatest(round((value - ?) / ?), 0), ?) AS BIGINT) AS bin, count(*) AS n
+        FROM ({events})
+        GROUP BY ALL
+    """, [float(grid[0]), float(step), len(grid) - 1])
+    binned = np.zeros((len(stats), len(grid)), dtype=np.int64)
+    binned[stats.index.get_indexer(counts["severity"]), counts["bin"].to_numpy()] = counts["n"].to_numpy()
+    return SeveritySummary.from_binned(stats, std, binned)
+
+
+# -----------------------
+# Map filters
+# -----------------------
+def filter_events(event_types=None, countries=None, severity=None, start=None, end=None,
+                  columns=None, csv_path: Path = CSV_PATH) -> pd.DataFrame:
+    """Located events matching the World Map filters, ordered by month.
+
+    Same semantics as the page: OR within a list, AND across filters, inclusive
+    severity range, [start, end] on month_start; None = no filter.
+    """
+    where, params = [BASE_FILTER, "latitude IS NOT NULL AND longitude IS NOT NULL"], []
+    if event_types:
+        where.append("list_contains(?, CAST(event_type AS VARCHAR))")
+        params.append([str(t) for t in event_types])
+    if countries:
+        where.append("list_contains(?, CAST(country AS VARCHAR))")
+        params.append([str(c) for c in countries])
+    if severity is not None:
+        where.append("severity BETWEEN ? AND ?")
+        params += [float(severity[0]), float(severity[1])]
+    if start is not None:
+        where.append("make_date(CAST(year AS INTEGER), CAST(month AS INTEGER), 1) >= ?")
+        params.append(pd.Timestamp(start).date())
+    if end is not None:
+        where.append("make_date(CAST(year AS INTEGER), CAST(month AS INTEGER), 1) <= ?")
+        params.append(pd.Timestamp(end).date())
+
+    month_start = "CAST(make_date(CAST(year AS INTEGER), CAST(month AS INTEGER), 1) AS TIMESTAMP)"
+    select = ", ".join(c for c in columns if c != "month_start") if columns else "*"
+    df = query(f"""
+        SELECT {select}, {month_start} AS month_start
+        FROM {source(csv_path, start, end)}
+        WHERE {" AND ".join(where)}
+        ORDER BY month_start
+    """, params)
+    # back to the app's compact dtypes
+    return apply_schema(df).reset_index(drop=True)
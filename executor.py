@@ -0,0 +1,60 @@
+# ---------------------------------------------------------
+# Partitioned aggregation (serial, threads or processes)
+# ---------------------------------------------------------
+# Mergeable aggregates (anything with build(frame) + merge(a, b)) are built per
+# row partition and merged. GC_EXECUTOR picks the backend:
+#   serial    : inline in the script thread (default)
+#   threads   : one shared thread pool; NumPy sorts/reductions release the GIL
+#   processes : one shared process pool; partitions are pickled column subsets
+# GC_WORKERS caps the pool size (default: all cores). Frames smaller than
+# GC_PARTITION_ROWS per worker are never split.
+
+from imports import *
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import reduce
+
+EXECUTOR = os.environ.get("GC_EXECUTOR", "serial").lower()
+WORKERS = int(os.environ.get("GC_WORKERS", 0)) or os.cpu_count() or 1
+PARTITION_ROWS = int(os.environ.get("GC_PARTITION_ROWS", 250_000))
+
+_KINDS = ("serial", "threads", "processes")
+
+
+@st.cache_resource(show_spinner=False)
+def _pool(kind: str, workers: int):
+    # One pool per process, shared by every session
+    if kind == "threads":
+        return ThreadPoolExecutor(workers, thread_name_prefix="gc-agg")
+    # spawn: never fork a process that is running Streamlit's threads
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def row_partitions(n_rows: int, workers: int = None, min_rows: int = None) -> list:
+    """Contiguous row slices, at most `workers` of them and none below `min_rows`."""
+    workers = workers or WORKERS
+    min_rows = min_rows or PARTITION_ROWS
+    parts = max(1, min(workers, n_rows // max(min_rows, 1)))
+    bounds = np.linspace(0, n_rows, parts + 1).astype(np.int64)
+    return [slice(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def map_reduce(frame: pd.DataFrame, build, merge, columns=None, kind: str = None):
+    """build() each row partition on the executor, then fold the partials with merge().
+
+    `columns` narrows what is shipped to worker processes; `build` must then be a
+    module-level function (or functools.partial of one) so it pickles.
+    """
+    kind = kind or EXECUTOR
+    if kind not in _KINDS:
+        raise ValueError(f"GC_EXECUTOR must be one of {_KINDS}, got {kind!r}")
+
+    parts = row_partitions(len(frame))
+    if kind == "serial" or len(parts) == 1:
+        return build(frame)
+
+    if columns is not None:
+        frame = frame[[c for c in columns if c in frame.columns]]
+    chunks = [frame.iloc[p] for p in parts]
+    partials = list(_pool(kind, WORKERS).map(build, chunks))
+    return reduce(merge, partials)
@@ -0,0 +1,58 @@
+# ---------------------------------------------------------
+# Memoised Plotly figures
+# ---------------------------------------------------------
+# Figures are keyed by a fingerprint of their aggregated input plus the styling
+# parameters and kept as figure JSON in a process-wide LRU. A repeat view
+# rebuilds the Figure from that JSON without Plotly's validation instead of
+# re-running px.* / update_layout / update_traces.
+
+from imports import *
+import plotly.graph_objects as go
+from caching import LRUCache
+
+FIGURE_CACHE_MB = int(os.environ.get("GC_FIGURE_CACHE_MB", 64))
+
+
+def _feed(h, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        meta = value.dtypes if isinstance(value, pd.DataFrame) else (value.name, value.dtype)
+        h.update(repr(meta).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(f"{value.dtype}{value.shape}".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(b"[")
+        for v in value:
+            _feed(h, v)
+        h.update(b"]")
+    elif isinstance(value, dict):
+        _feed(h, sorted(value.items(), key=lambda kv: repr(kv[0])))
+    else:
+        h.update(repr(value).encode() + b"\0")
+
+
+def fingerprint(*parts) -> str:
+    """Content hash of frames / arrays / plain values (order matters)."""
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        _feed(h, p)
+    return h.hexdigest()
+
+
+@st.cache_resource(show_spinner=False)
+def figure_cache() -> LRUCache:
+    # Shared by all sessions: same inputs + style -> same figure for everyone
+    return LRUCache(FIGURE_CACHE_MB << 20)
+
+
+def cached_figure(build, *inputs) -> go.Figure:
+    """build() once per distinct `inputs` (aggregated data + style parameters)."""
+    key = fingerprint(*inputs)
+    cache = figure_cache()
+    spec = cache.get(key)
+    if spec is not None:
+        return go.Figure(json.loads(spec), _validate=False)
+    fig = build()
+    cache.put(key, fig.to_json())
+    return fig
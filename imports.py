@@ -1,23 +1,443 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-from matplotlib import pyplot as plt
-import plotly.express as px
 import numpy as np
 import calendar
+import hashlib
+import json
+import io
+import os
+import shutil
+import threading
 
+# Frames handed out by the shared caches are only copied when a page writes to them
+pd.options.mode.copy_on_write = True
 
-@st.cache_data
-def load_gc():
-    csv_path = Path(__file__).parent / "data" / "global_climate_events_economic_impact_2020_2025.csv"
-    df = pd.read_csv(csv_path)
+DATA_DIR = Path(__file__).parent / "data"
+# GC_CSV_PATH points the app at another events file with the same schema (e.g. bench data)
+CSV_PATH = Path(os.environ.get("GC_CSV_PATH", DATA_DIR / "global_climate_events_economic_impact_2020_2025.csv"))
+STORE_DIR = Path(os.environ.get("GC_STORE_DIR", DATA_DIR / ".cache"))
+# The store is built from the CSV this many rows at a time
+STORE_CHUNK_ROWS = int(os.environ.get("GC_STORE_CHUNK_ROWS", 200_000))
 
-    df["year"] = df["year"].astype(int)
-    df["month"] = pd.to_numeric(df.get("month"), errors="coerce")
-    df["severity"] = pd.to_numeric(df["severity"], errors="coerce")
-    df["economic_impact_million_usd"] = pd.to_numeric(df["economic_impact_million_usd"], errors="coerce")
+# Bump when GC_SCHEMA (or the store layout) changes so stale columnar stores are rebuilt
+SCHEMA_VERSION = 5
 
-    # Remove partial year 2025
-    df = df[df["year"] < 2025].copy()
+# Months the app loads (YYYY-MM, inclusive); only the store partitions in this
+# window are read. The archive ends with a partial year, so by default the
+# window stops at the last full one; move GC_LOAD_END as the archive grows.
+LOAD_START = os.environ.get("GC_LOAD_START") or None
+LOAD_END = os.environ.get("GC_LOAD_END") or "2024-12"
+
+# Explicit dtypes for the columnar store.
+# Counts that could ever be missing fall back to float32 (see _cast_column).
+GC_SCHEMA = {
+    "event_id": "event_id",
+    "date": "datetime",
+    "country": "category",
+    "event_type": "category",
+    "year": "int16",
+    "month": "int8",
+    "severity": "int8",
+    "duration_days": "int32",
+    "affected_population": "int32",
+    "deaths": "int32",
+    "injuries": "int32",
+    "response_time_hours": "int32",
+    "total_casualties": "int32",
+    "economic_impact_million_usd": "float32",
+    "infrastructure_damage_score": "float32",
+    "international_aid_million_usd": "float32",
+    "latitude": "float32",
+    "longitude": "float32",
+    "impact_per_capita": "float32",
+    "aid_percentage": "float32",
+}
+
+
+# "EV01539" <-> 1539: ids are kept as int32 and only formatted for display,
+# as long as format_event_id gives back every id of the column exactly
+EVENT_ID_PREFIX = "EV"
+EVENT_ID_WIDTH = 5
+
+
+def format_event_id(n) -> str:
+    return f"{EVENT_ID_PREFIX}{int(n):0{EVENT_ID_WIDTH}d}"
+
+
+def _event_id_column(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_integer_dtype(s):
+        return s.astype("int32")
+    text = s.astype(str)
+    n = pd.to_numeric(text.str.removeprefix(EVENT_ID_PREFIX), errors="coerce")
+    info = np.iinfo(np.int32)
+    if not n.isna().any() and (not len(n) or (n.min() >= info.min and n.max() <= info.max)):
+        n = n.astype("int32")
+        # only if format_event_id gives every id back ("EV001" and "EV01" would both be 1)
+        if (EVENT_ID_PREFIX + n.astype(str).str.zfill(EVENT_ID_WIDTH)).equals(text):
+            return n
+    # ids from another feed format: still compact, just not numeric
+    return s.astype("category")
+
+
+def _cast_column(s: pd.Series, dtype: str) -> pd.Series:
+    if dtype == "category":
+        return s.astype("category")
+    if dtype == "event_id":
+        return _event_id_column(s)
+    if dtype == "datetime":
+        # one unit whatever the reader (DuckDB hands back microseconds)
+        return pd.to_datetime(s, errors="coerce").astype("datetime64[ns]")
+    s = pd.to_numeric(s, errors="coerce")
+    if dtype.startswith("int"):
+        # astype would wrap values outside the narrow range: widen instead
+        info = np.iinfo(dtype)
+        fits = s.isna().all() or (s.min() >= info.min and s.max() <= info.max)
+        if s.isna().any():
+            # numpy ints can't hold NaN -> keep the gaps as float
+            return s.astype("float32" if fits else "float64")
+        return s.astype(dtype if fits else "int64")
+    return s.astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    if "year" in df.columns:
+        df = df.dropna(subset=["year"])
+    for col, dtype in GC_SCHEMA.items():
+        if col in df.columns:
+            df[col] = _cast_column(df[col], dtype)
+    return df
+
+
+class EventIds:
+    """Event ids met so far in one file: a sorted int array (8 bytes per id), text ids in a set."""
+
+    def __init__(self):
+        self.ints = np.empty(0, dtype=np.int64)
+        self.text = set()
+
+    @staticmethod
+    def _as_ints(ids: pd.Series):
+        # (int value, whether the id is one) -- text ids that round-trip count as ints
+        if pd.api.types.is_integer_dtype(ids):
+            return ids.to_numpy(dtype=np.int64), np.ones(len(ids), dtype=bool)
+        text = ids.astype(str)
+        n = pd.to_numeric(text.str.removeprefix(EVENT_ID_PREFIX), errors="coerce").fillna(-1).astype(np.int64)
+        exact = (EVENT_ID_PREFIX + n.astype(str).str.zfill(EVENT_ID_WIDTH)).eq(text) & (n >= 0)
+        return n.to_numpy(), exact.to_numpy()
+
+    def add_new(self, ids: pd.Series) -> np.ndarray:
+        """Mask of the (distinct) ids not met before; they are recorded."""
+        values, is_int = self._as_ints(ids)
+        new = np.ones(len(ids), dtype=bool)
+        if len(self.ints):
+            v = values[is_int]
+            pos = np.minimum(np.searchsorted(self.ints, v), len(self.ints) - 1)
+            new[is_int] = self.ints[pos] != v
+        if not is_int.all():
+            text = ids[~is_int].astype(str)
+            new[~is_int] = ~text.isin(self.text).to_numpy()
+            self.text.update(text[new[~is_int]])
+        # two sorted runs: the stable sort merges them in linear time
+        added = np.sort(values[is_int & new])
+        self.ints = np.sort(np.concatenate([self.ints, added]), kind="stable")
+        return new
+
+
+def first_events(df: pd.DataFrame, seen: EventIds = None) -> pd.DataFrame:
+    """One row per event_id, the first in file order; `seen` carries ids across chunks of one file."""
+    if "event_id" not in df.columns:
+        return df
+    df = df.drop_duplicates("event_id")
+    if seen is not None:
+        df = df[seen.add_new(df["event_id"])]
+    return df
+
+
+def csv_signature(csv_path: Path) -> dict:
+    stat = csv_path.stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _file_sha1(path: Path, size: int = None) -> str:
+    # of the first `size` bytes (default: the whole file)
+    h = hashlib.sha1()
+    left = float("inf") if size is None else size
+    with open(path, "rb") as f:
+        while left > 0:
+            block = f.read(int(min(1 << 20, left)))
+            if not block:
+                break
+            h.update(block)
+            left -= len(block)
+    return h.hexdigest()
+
+
+def _store_paths(csv_path: Path):
+    return STORE_DIR / csv_path.stem, STORE_DIR / f"{csv_path.stem}.meta.json"
+
+
+def month_key(year, month):
+    # Months since year 0: one comparable integer per (year, month)
+    return year * 12 + month - 1
+
+
+def parse_month(value):
+    """"2023-05" / Timestamp / date -> month key; None stays None."""
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    return month_key(ts.year, ts.month)
+
+
+def store_partitions(store: Path, start=None, end=None) -> list:
+    """Partition files of a store overlapping [start, end] (inclusive months), in time order.
+
+    Layout: <store>/<year>/<month>.parquet; rows without a month live in
+    <year>/00.parquet and are only read when no window is asked for.
+    """
+    lo, hi = parse_month(start), parse_month(end)
+    files = []
+    for path in sorted(store.glob("*/*.parquet")):
+        year, month = int(path.parent.name), int(path.stem)
+        if month == 0:
+            if lo is None and hi is None:
+                files.append(path)
+            continue
+        key = month_key(year, month)
+        if (lo is None or key >= lo) and (hi is None or key <= hi):
+            files.append(path)
+    return files
+
+
+def in_window(df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    """Rows whose (year, month) falls in [start, end]; the row-level twin of store_partitions."""
+    lo, hi = parse_month(start), parse_month(end)
+    if lo is None and hi is None:
+        return df
+    key = month_key(df["year"].astype("float64"), df["month"].astype("float64"))
+    keep = key.notna()
+    if lo is not None:
+        keep &= key >= lo
+    if hi is not None:
+        keep &= key <= hi
+    return df[keep]
+
+
+# csv path -> (CSV + meta signatures, fresh_store verdict): a CSV that changed
+# is hashed once per version, not on every query that asks for the store
+_verdicts = {}
+
+
+def fresh_store(csv_path: Path = CSV_PATH):
+    """Directory of the partitioned store if it matches the CSV (and current schema), else None."""
+    store, meta_path = _store_paths(csv_path)
+    if not (store.is_dir() and meta_path.exists()):
+        return None
+
+    sig, meta_stat = csv_signature(csv_path), meta_path.stat()
+    key = (sig["mtime_ns"], sig["size"], meta_stat.st_mtime_ns, meta_stat.st_size)
+    cached = _verdicts.get(str(csv_path))
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    verdict = _check_store(csv_path, store, meta_path)
+    _verdicts[str(csv_path)] = key, verdict
+    return verdict
+
+
+def _check_store(csv_path: Path, store: Path, meta_path: Path):
+    meta = json.loads(meta_path.read_text())
+    if meta.get("schema") != SCHEMA_VERSION:
+        return None
+    sig = csv_signature(csv_path)
+    if meta.get("mtime_ns") != sig["mtime_ns"] or meta.get("size") != sig["size"]:
+        # mtime/size moved: only rebuild if the content really changed
+        if meta.get("sha1") != _file_sha1(csv_path):
+            return None
+        meta.update(sig)
+        meta_path.write_text(json.dumps(meta))
+
+    return store
+
+
+def _read_store(csv_path: Path, start=None, end=None):
+    store = columnar_store(csv_path)
+    if store is None:
+        return None
+    files = store_partitions(store, start, end)
+    if not files:
+        # nothing overlaps the window: empty frame with the stored dtypes
+        df = pd.read_parquet(next(store.glob("*/*.parquet"))).iloc[:0]
+    else:
+        df = pd.read_parquet(files)
+    if "event_id" in df.columns and df["event_id"].dtype == object:
+        # text ids are stored as plain strings (see _union_dtype)
+        df["event_id"] = df["event_id"].astype("category")
+    return df
+
+
+def _union_dtype(a, b, target: str):
+    """The dtype _cast_column gives a whole column, from the dtypes it gave two chunks of it."""
+    if a is None or a == b:
+        return b
+    if target == "event_id":
+        # some chunk has ids that aren't ints: plain strings, as one category per id
+        # would repeat the whole id list in every partition
+        return np.dtype(object)
+    if isinstance(a, pd.CategoricalDtype) and isinstance(b, pd.CategoricalDtype):
+        return pd.CategoricalDtype(a.categories.union(b.categories))
+    if a.kind in "iuf" and b.kind in "iuf":
+        # gaps -> float, values outside the narrow type -> 64 bits (as _cast_column)
+        wide = max(a.itemsize, b.itemsize) == 8
+        if "f" in (a.kind, b.kind):
+            return np.dtype("float64" if wide else "float32")
+        return np.dtype("int64") if wide else a
+    return np.result_type(a, b)
+
+
+def _conform(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    for col, dtype in dtypes.items():
+        if df[col].dtype == dtype:
+            continue
+        if col == "event_id" and dtype == object and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].map(format_event_id)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def _build_store(csv_path: Path, chunk_rows: int = None):
+    """Write the partitioned store from the CSV in chunks of `chunk_rows` rows; its directory, or None.
+
+    Memory follows the chunk size: typed, de-duplicated chunks are spilled to
+    Parquet while the column dtypes of the whole file are worked out, then
+    re-read, brought to those dtypes (full category lists, so any subset of
+    partitions reads back the same) and appended to one file per month.
+    """
+    chunk_rows = chunk_rows or STORE_CHUNK_ROWS
+    store, meta_path = _store_paths(csv_path)
+    tmp = store.with_name(f"{store.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    writers = {}
+    try:
+        # what the store is built from: a CSV growing meanwhile is stale on the next check
+        meta = csv_signature(csv_path)
+        meta["sha1"] = _file_sha1(csv_path, meta["size"])
+        meta["schema"] = SCHEMA_VERSION
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        spill, seen, dtypes, n = tmp / "chunks", EventIds(), {}, 0
+        spill.mkdir(parents=True)
+        with pd.read_csv(csv_path, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                chunk = first_events(apply_schema(chunk), seen)
+                for col in chunk.columns:
+                    dtypes[col] = _union_dtype(dtypes.get(col), chunk[col].dtype, GC_SCHEMA.get(col))
+                chunk.to_parquet(spill / f"{n:06d}.parquet", index=False)
+                n += 1
+        del seen
+
+        for path in sorted(spill.glob("*.parquet")):
+            df = _conform(pd.read_parquet(path), dtypes)
+            month = df["month"].fillna(0).astype("int8")
+            for (year, m), part in df.groupby([df["year"], month], sort=True):
+                table = pa.Table.from_pandas(part, preserve_index=False)
+                if (year, m) not in writers:
+                    (tmp / str(year)).mkdir(exist_ok=True)
+                    writers[year, m] = pq.ParquetWriter(tmp / str(year) / f"{m:02d}.parquet", table.schema)
+                writers[year, m].write_table(table)
+        for writer in writers.values():
+            writer.close()
+        shutil.rmtree(spill)
+        if not writers:
+            # header-only CSV: one empty partition keeps the dtypes
+            (tmp / "0").mkdir()
+            apply_schema(pd.read_csv(csv_path, nrows=0)).to_parquet(tmp / "0" / "00.parquet", index=False)
+
+        shutil.rmtree(store, ignore_errors=True)
+        tmp.replace(store)
+        meta_path.write_text(json.dumps(meta))
+        return store
+    except (ImportError, OSError):
+        # no parquet engine / read-only disk -> stay on the CSV path
+        for writer in writers.values():
+            writer.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+        return None
+
+
+_build_lock = threading.Lock()
+
+
+def columnar_store(csv_path: Path = CSV_PATH):
+    """Directory of the partitioned store for the CSV, (re)built when stale; None if it can't be written."""
+    store = fresh_store(csv_path)
+    if store is None:
+        # one build at a time; a caller that waited finds the store built
+        with _build_lock:
+            store = fresh_store(csv_path) or _build_store(csv_path)
+    return store
+
+
+def read_gc_table(csv_path: Path = CSV_PATH, start=None, end=None) -> pd.DataFrame:
+    """Typed events table, optionally only the months in [start, end].
+
+    From the partitioned Parquet store (built chunk by chunk when stale; only
+    the overlapping partitions are opened), otherwise from the CSV in chunks,
+    keeping only the window. A repeated event_id keeps its first row in the
+    file, as appends do.
+    """
+    try:
+        df = _read_store(csv_path, start, end)
+    except (ImportError, OSError, ValueError):
+        df = None
+
+    if df is None:
+        seen, parts, dtypes = EventIds(), [], {}
+        with pd.read_csv(csv_path, chunksize=STORE_CHUNK_ROWS) as reader:
+            for chunk in reader:
+                chunk = first_events(apply_schema(chunk), seen)
+                for col in chunk.columns:
+                    dtypes[col] = _union_dtype(dtypes.get(col), chunk[col].dtype, GC_SCHEMA.get(col))
+                parts.append(in_window(chunk, start, end))
+        df = pd.concat([_conform(part, dtypes) for part in parts], ignore_index=True)
+        if "event_id" in df.columns and df["event_id"].dtype == object:
+            df["event_id"] = df["event_id"].astype("category")
+
+    return df
+
+
+def csv_marker(csv_path: Path, offset: int, width: int = 4096) -> str:
+    """Hash of the bytes just before `offset`; unchanged marker + bigger file = pure append."""
+    with open(csv_path, "rb") as f:
+        f.seek(max(offset - width, 0))
+        return hashlib.sha1(f.read(min(offset, width))).hexdigest()
+
+
+def read_appended_rows(csv_path: Path, offset: int, columns: list):
+    """Typed rows appended to the CSV after byte `offset` -> (frame, new offset).
+
+    Only complete lines are consumed; a trailing partial line is left for the next call.
+    """
+    with open(csv_path, "rb") as f:
+        if offset > 0:
+            f.seek(offset - 1)
+            if f.read(1) != b"\n":
+                # offset fell inside a line that the full load already parsed
+                f.readline()
+        start = f.tell()
+        chunk = f.read()
+
+    end = chunk.rfind(b"\n") + 1
+    if end == 0:
+        return apply_schema(pd.DataFrame(columns=columns)), start
+
+    df = pd.read_csv(io.BytesIO(chunk[:end]), header=None, names=columns)
+    return apply_schema(df), start + end
+
+
+def data_version(csv_path: Path = CSV_PATH) -> str:
+    sig = csv_signature(csv_path)
+    return f"{sig['mtime_ns']}-{sig['size']}"
 
-    return df
\ No newline at end of file
@@ -0,0 +1,94 @@
+# ---------------------------------------------------------
+# Opt-in render instrumentation (sidebar toggle or GC_INSTRUMENT=1)
+# ---------------------------------------------------------
+# Pages wrap their stages in `stage(...)` and draw charts through `chart(...)`;
+# the app shows the records of the current rerun in a debug expander and, if
+# GC_METRICS_PATH is set, appends them as JSON lines for monitoring.
+
+import streamlit as st
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+ENV_FLAG = "GC_INSTRUMENT"
+METRICS_PATH = os.environ.get("GC_METRICS_PATH")
+STATE_KEY = "instrument_enabled"
+_RECORDS_KEY = "_instrument_records"
+
+
+def default_enabled() -> bool:
+    return os.environ.get(ENV_FLAG, "").lower() in ("1", "true", "yes", "on")
+
+
+def enabled() -> bool:
+    return bool(st.session_state.get(STATE_KEY, default_enabled()))
+
+
+def begin(page: str):
+    st.session_state[_RECORDS_KEY] = {"page": page, "records": []}
+
+
+def _records() -> list:
+    run = st.session_state.get(_RECORDS_KEY)
+    return run["records"] if run else []
+
+
+@contextmanager
+def stage(name: str, rows_in=None):
+    """Time a block; the caller may set rec["rows_out"] / rec["bytes"] inside it."""
+    rec = {"stage": name, "rows_in": rows_in, "rows_out": None, "bytes": None}
+    if not enabled():
+        yield rec
+        return
+
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec["seconds"] = round(time.perf_counter() - t0, 6)
+        _records().append(rec)
+
+
+def chart(fig, **kwargs):
+    # st.plotly_chart + the size of the figure JSON sent to the browser
+    # (serialized outside the timed block so the measurement doesn't inflate it)
+    nbytes = None
+    if enabled():
+        nbytes = len(fig.to_json()) if hasattr(fig, "to_json") else len(json.dumps(fig))
+    with stage("chart") as rec:
+        rec["bytes"] = nbytes
+        return st.plotly_chart(fig, **kwargs)
+
+
+def render_panel():
+    run = st.session_state.get(_RECORDS_KEY)
+    if not enabled() or not run or not run["records"]:
+        return
+
+    records = run["records"]
+    total = sum(r.get("seconds", 0) for r in records)
+    with st.expander(f"⏱ Debug: render timing — {total * 1000:.0f} ms", expanded=False):
+        st.dataframe(
+            [
+                {
+                    "stage": r["stage"],
+                    "ms": round(r.get("seconds", 0) * 1000, 2),
+                    "rows in": r["rows_in"],
+                    "rows out": r["rows_out"],
+                    "figure bytes": r["bytes"],
+                }
+                for r in records
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+        if METRICS_PATH:
+            st.caption(f"Appended to `{METRICS_PATH}`")
+
+    if METRICS_PATH:
+        ts = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        with open(METRICS_PATH, "a") as f:
+            for r in records:
+                f.write(json.dumps({"ts": ts, "page": run["page"], **r}) + "\n")
@@ -0,0 +1,171 @@
+# ---------------------------------------------------------
+# Mergeable quantile sketches (KLL style)
+# ---------------------------------------------------------
+# One small sketch of log10_impact per (severity, year, event_type) cell. A
+# sketch keeps a few hundred weighted samples whatever the number of rows;
+# merging two sketches is concatenate + compact, so any year / event type
+# selection is answered by merging the matching cells instead of sorting rows.
+# Rank error is bounded by GC_SKETCH_ERROR (default 1%: a reported median lies
+# between the 49th and 51st percentile); tests/test_sketches.py checks it and
+# bench/sketch_accuracy.py measures it on the real archive.
+
+from imports import *
+import math
+
+SKETCH_ERROR = float(os.environ.get("GC_SKETCH_ERROR", 0.01))
+
+
+def k_for_error(error: float) -> int:
+    """Top compactor capacity for a target normalized rank error."""
+    return max(8, math.ceil(4.0 / error))
+
+
+class QuantileSketch:
+    """KLL sketch: level h holds sorted-then-halved samples of weight 2**h.
+
+    Compacting a level sorts it and promotes every other item (random offset, so
+    the rounding errors cancel on average) to the level above; lower
+    levels get geometrically smaller capacities, which bounds the size to ~3k.
+    """
+
+    def __init__(self, k: int = None):
+        self.k = k or k_for_error(SKETCH_ERROR)
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.lo, self.hi = np.inf, -np.inf
+        # compaction offsets: random (unbiased) but seeded, so rebuilds are reproducible
+        self._rng = np.random.default_rng(self.k)
+
+    @classmethod
+    def from_values(cls, values, k: int = None) -> "QuantileSketch":
+        sketch = cls(k)
+        sketch.update(values)
+        return sketch
+
+    def update(self, values) -> "QuantileSketch":
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.lo, self.hi = min(self.lo, values.min()), max(self.hi, values.max())
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    @classmethod
+    def merge(cls, a: "QuantileSketch", b: "QuantileSketch") -> "QuantileSketch":
+        out = cls(max(a.k, b.k))
+        depth = max(len(a.levels), len(b.levels))
+        out.levels = [
+            np.concatenate([s.levels[h] for s in (a, b) if h < len(s.levels)]) for h in range(depth)
+        ]
+        out._rng = np.random.default_rng([a.n, b.n, out.k])
+        out.n = a.n + b.n
+        out.lo, out.hi = min(a.lo, b.lo), max(a.hi, b.hi)
+        out._compress()
+        return out
+
+    def _capacity(self, h: int) -> int:
+        return max(2, math.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - h)))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # an odd item stays behind so the total weight is preserved exactly
+                keep, pairs = (level[:1], level[1:]) if len(level) % 2 else (level[:0], level)
+                offset = int(self._rng.integers(2))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], pairs[offset::2]])
+                self.levels[h] = keep
+                # capacities depend on the depth: recheck from the bottom
+                h = 0
+                continue
+            h += 1
+
+    def items(self):
+        """(values, weights) of the retained samples; weights sum to n."""
+        if not self.n:
+            return np.empty(0), np.empty(0)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(l), 2.0 ** h) for h, l in enumerate(self.levels)])
+        return values, weights
+
+    def quantiles(self, qs) -> np.ndarray:
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.n:
+            return np.full(len(qs), np.nan)
+        values, weights = self.items()
+        order = np.argsort(values, kind="stable")
+        values, cum = values[order], np.cumsum(weights[order])
+        # sample covering rank q * (n - 1) (0-based), like the exact linear quantile
+        pos = np.searchsorted(cum, qs * (self.n - 1), side="right")
+        out = values[np.minimum(pos, len(values) - 1)]
+        out = np.where(qs <= 0, self.lo, np.where(qs >= 1, self.hi, out))
+        return np.clip(out, self.lo, self.hi)
+
+    def rank(self, x: float) -> float:
+        """Approximate fraction of values <= x."""
+        values, weights = self.items()
+        return float(weights[values <= x].sum() / self.n) if self.n else float("nan")
+
+    def __len__(self):
+        return sum(len(l) for l in self.levels)
+
+
+class SketchCube:
+    """One QuantileSketch of log10_impact per (severity, year, event_type) cell."""
+
+    COLUMNS = ["severity", "year", "event_type", "log10_impact"]
+
+    def __init__(self, cells: dict):
+        self.cells = cells  # (severity, year, event_type) -> QuantileSketch
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, k: int = None) -> "SketchCube":
+        df = df[df["severity"].notna() & df["log10_impact"].notna()]
+        sev = df["severity"].to_numpy().astype(np.int64)
+        year = df["year"].to_numpy().astype(np.int64)
+        types = pd.Categorical(df["event_type"].astype(str))
+        codes = types.codes.astype(np.int64)
+        val = df["log10_impact"].to_numpy().astype(np.float64)
+
+        # one sort groups every cell into a contiguous run
+        order = np.lexsort((codes, year, sev))
+        keys = np.stack([sev[order], year[order], codes[order]], axis=1)
+        if not len(keys):
+            return cls({})
+        starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+        ends = np.r_[starts[1:], len(keys)]
+        val = val[order]
+        names = np.asarray(types.categories, dtype=object)
+        return cls({
+            (int(keys[a, 0]), int(keys[a, 1]), str(names[keys[a, 2]])): QuantileSketch.from_values(val[a:b], k)
+            for a, b in zip(starts, ends)
+        })
+
+    @classmethod
+    def merge(cls, a: "SketchCube", b: "SketchCube") -> "SketchCube":
+        cells = dict(a.cells)
+        for key, sketch in b.cells.items():
+            cells[key] = QuantileSketch.merge(cells[key], sketch) if key in cells else sketch
+        return cls(cells)
+
+    def years(self) -> list:
+        return sorted({y for _, y, _ in self.cells})
+
+    def event_types(self) -> list:
+        return sorted({t for _, _, t in self.cells})
+
+    def by_severity(self, years=None, event_types=None) -> dict:
+        """severity -> merged sketch of the cells in the selected years / event types (None = all)."""
+        years = None if years is None else {int(y) for y in years}
+        event_types = None if event_types is None else {str(t) for t in event_types}
+        out = {}
+        for (sev, year, etype), sketch in self.cells.items():
+            if (years is None or year in years) and (event_types is None or etype in event_types):
+                out[sev] = QuantileSketch.merge(out[sev], sketch) if sev in out else sketch
+        return dict(sorted(out.items()))
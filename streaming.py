@@ -0,0 +1,153 @@
+# ---------------------------------------------------------
+# Out-of-core aggregation (GC_STREAMING=1)
+# ---------------------------------------------------------
+# The history pages only need aggregates, so these are built in one pass over
+# the events file in bounded chunks (GC_STREAM_CHUNK_ROWS rows at a time) and
+# folded with the aggregates' own merge(): peak memory follows the chunk size,
+# not the file size. The source is the columnar store (itself built from the CSV
+# in chunks), or the CSV read with chunksize when it can't be written. The
+# result is pickled next to the store and reused until the CSV changes.
+#
+# The pass covers the whole archive up to GC_LOAD_END. The in-memory frame
+# (the map and the outlier table need rows) then only holds the last
+# GC_STREAM_FRAME_MONTHS months with events, or starts at GC_LOAD_START when set;
+# the World Map shows the whole archive from the streamed grid / country bins.
+
+from imports import *
+import pickle
+import threading
+from functools import partial
+from dataset import prepare_frame
+from sketches import SketchCube
+from analysis import TrendSums
+from aggregates import CountCube, RollupCube, SeverityHistogram, _merge_spatial, _spatial_partial
+
+STREAMING = os.environ.get("GC_STREAMING", "0").lower() in ("1", "true", "yes")
+CHUNK_ROWS = int(os.environ.get("GC_STREAM_CHUNK_ROWS", 200_000))
+FRAME_MONTHS = int(os.environ.get("GC_STREAM_FRAME_MONTHS", 12))
+# Grid of the streamed map bins (the map's default cell size)
+MAP_CELL_DEG = 2.0
+
+# name -> (build(chunk), merge(a, b)); names are the PreparedData.aggregate keys
+STREAMED = {
+    "temporal_cube": (CountCube.from_frame, CountCube.merge),
+    "severity_histogram": (SeverityHistogram.from_frame, SeverityHistogram.merge),
+    "rollup": (RollupCube.from_frame, RollupCube.merge),
+    "severity_sketches": (SketchCube.from_frame, SketchCube.merge),
+    "severity_trends": (TrendSums.from_frame, TrendSums.merge),
+    "map_bins:grid": (partial(_spatial_partial, by="grid", cell_deg=MAP_CELL_DEG), _merge_spatial),
+    "map_bins:country": (partial(_spatial_partial, by="country"), _merge_spatial),
+}
+
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return STREAMING
+
+
+def _cache_path(csv_path: Path) -> Path:
+    return STORE_DIR / f"{csv_path.stem}.aggregates.pkl"
+
+
+def _cache_key(csv_path: Path) -> dict:
+    return {**csv_signature(csv_path), "schema": SCHEMA_VERSION, "end": LOAD_END, "names": sorted(STREAMED)}
+
+
+def iter_chunks(csv_path: Path = CSV_PATH, chunk_rows: int = None):
+    """Prepared frames of at most `chunk_rows` rows covering the archive up to LOAD_END."""
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    store = columnar_store(csv_path)
+    if store is not None:
+        import pyarrow.parquet as pq
+
+        def raw_chunks():
+            for path in store_partitions(store, None, LOAD_END):
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+                    yield batch.to_pandas()
+    else:
+        def raw_chunks():
+            seen = EventIds()
+            with pd.read_csv(csv_path, chunksize=chunk_rows) as reader:
+                for chunk in reader:
+                    yield first_events(apply_schema(chunk), seen)
+
+    for raw in raw_chunks():
+        rows = in_window(raw, None, LOAD_END)
+        if len(rows):
+            yield prepare_frame(rows)
+
+
+def stream_aggregates(csv_path: Path = CSV_PATH, chunk_rows: int = None) -> dict:
+    """Every STREAMED aggregate in one pass: build per chunk, fold with merge."""
+    out = {}
+    for chunk in iter_chunks(csv_path, chunk_rows):
+        # fold as we go: one chunk and the running aggregates alive at a time
+        for name, (build, merge) in STREAMED.items():
+            part = build(chunk)
+            out[name] = merge(out[name], part) if name in out else part
+    missing = [name for name in STREAMED if name not in out]
+    if missing:
+        # empty archive: aggregates of an empty prepared frame
+        empty = prepare_frame(apply_schema(pd.read_csv(csv_path, nrows=0)))
+        out.update({name: STREAMED[name][0](empty) for name in missing})
+    return out
+
+
+def _read_cache(csv_path: Path):
+    path = _cache_path(csv_path)
+    try:
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        return None
+    return cached["aggregates"] if cached.get("key") == _cache_key(csv_path) else None
+
+
+def _write_cache(csv_path: Path, aggregates: dict):
+    path = _cache_path(csv_path)
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    try:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            pickle.dump({"key": _cache_key(csv_path), "aggregates": aggregates}, f, pickle.HIGHEST_PROTOCOL)
+        tmp.replace(path)
+    except OSError:
+        # read-only disk -> recompute next time
+        tmp.unlink(missing_ok=True)
+
+
+def cached_aggregates(csv_path: Path = CSV_PATH) -> dict:
+    """Streamed aggregates from the on-disk cache, streaming the file when it is stale."""
+    with _lock:
+        aggregates = _read_cache(csv_path)
+        if aggregates is None:
+            aggregates = stream_aggregates(csv_path)
+            _write_cache(csv_path, aggregates)
+        return aggregates
+
+
+def frame_start(aggregates: dict):
+    """First month ("YYYY-MM") the in-memory frame holds next to the streamed history."""
+    if LOAD_START:
+        return LOAD_START
+    cube = aggregates["temporal_cube"]
+    filled = np.flatnonzero(cube.counts.sum(axis=2).ravel())
+    if not len(filled):
+        return None
+    key = month_key(int(cube.years[0]), 1) + filled[-1] - (FRAME_MONTHS - 1)
+    return f"{key // 12:04d}-{key % 12 + 1:02d}"
+
+
+def attach(data, aggregates: dict = None) -> None:
+    """Seed a PreparedData with the streamed aggregates it doesn't hold yet.
+
+    They are registered with their build / merge, so CSV appends keep them current.
+    """
+    names = [name for name in STREAMED if name not in data._aggregates]
+    if not names:
+        return
+    aggregates = aggregates or cached_aggregates(CSV_PATH)
+    for name in names:
+        build, merge = STREAMED[name]
+        data.seed(name, aggregates[name], build, merge)
@@ -0,0 +1,26 @@
+# The app reads GC_CSV_PATH / GC_STORE_DIR at import, so the synthetic events
+# file is written (and the variables set) before any test imports it.
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from synth import write_csv  # noqa: E402
+
+N_ROWS = 3000
+WORK_DIR = Path(tempfile.mkdtemp(prefix="gc_tests_"))
+CSV = write_csv(N_ROWS, WORK_DIR / "gc_synth.csv")
+os.environ["GC_CSV_PATH"] = str(CSV)
+os.environ["GC_STORE_DIR"] = str(WORK_DIR / "cache")
+
+
+@pytest.fixture(scope="session")
+def csv_path() -> Path:
+    return CSV
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset
+import executor
+from aggregates import CountCube, RollupCube, SeverityHistogram, SeveritySummary, spatial_bins
+from analysis import TrendSums
+from sketches import SketchCube
+
+# what a partitioned build must reproduce of the whole-frame one
+RESULTS = {
+    CountCube: lambda a: a.counts,
+    RollupCube: lambda a: (
+        a.table.astype({"country": str, "event_type": str}).sort_values(RollupCube.KEYS)
+        .drop(columns=["country", "event_type"]).to_numpy(dtype=np.float64)
+    ),
+    SeveritySummary: lambda a: a.stats.to_numpy(),
+    SeverityHistogram: lambda a: a.counts,
+    SketchCube: lambda a: np.array([[s.n, s.lo, s.hi] for _, s in sorted(a.cells.items())]),
+    TrendSums: lambda a: a.table.sort_index().to_numpy(),
+}
+
+
+@pytest.mark.parametrize("cls", list(RESULTS), ids=lambda c: c.__name__)
+def test_partitions_ship_only_the_declared_columns(cls, monkeypatch):
+    frame = dataset.get_prepared().frame
+    monkeypatch.setattr(executor, "WORKERS", 4)
+    monkeypatch.setattr(executor, "PARTITION_ROWS", len(frame) // 4)
+    shipped = []
+
+    def build(part):
+        shipped.append(sorted(part.columns))
+        return cls.from_frame(part)
+
+    partitioned = executor.map_reduce(frame, build, cls.merge, cls.COLUMNS, kind="threads")
+
+    assert len(shipped) == 4 and all(c == sorted(cls.COLUMNS) for c in shipped)
+    np.testing.assert_allclose(RESULTS[cls](partitioned), RESULTS[cls](cls.from_frame(frame)), rtol=1e-5)
+
+
+def test_histogram_quartiles_within_one_bin_of_exact():
+    # impacts rounded to cents like the real feed: log10 values are discrete with wide gaps
+    rng = np.random.default_rng(0)
+    n = 600
+    impact = np.round(rng.lognormal(-4, 1, n), 2)
+    frame = pd.DataFrame({
+        "severity": rng.integers(1, 4, n),
+        "log10_impact": np.log10(np.where(impact > 0, impact, np.nan)),
+    })
+
+    approx = SeveritySummary.from_histogram(SeverityHistogram.from_frame(frame)).stats
+    exact = SeveritySummary.from_frame(frame).stats
+    cols = ["min", "q1", "median", "q3", "max"]
+    err = np.abs(approx[cols].to_numpy() - exact[cols].to_numpy()).max()
+    assert err <= np.diff(SeverityHistogram.EDGES).max()
+
+
+def test_grid_bins_keep_the_map_edges_in_the_last_cell():
+    frame = pd.DataFrame({
+        "latitude": [90.0, 89.0, -90.0, 0.0, 0.0],
+        "longitude": [180.0, 179.0, -180.0, 180.0, -179.0],
+        "country": "X",
+        "economic_impact_million_usd": 1.0,
+        "severity": 5,
+        "event_type_clean": "Flood",
+    })
+    bins = spatial_bins(frame, by="grid", cell_deg=2.0)
+    # (90, 180) joins (89, 179); (0, 180) stays on its own row, apart from (0, -179)
+    assert sorted(bins["events"]) == [1, 1, 1, 2]
+    assert bins["latitude"].between(-90, 90).all()
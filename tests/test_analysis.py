@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset
+from analysis import IQR_K, ROBUST_Z, TrendSums, find_outliers
+
+
+def _synthetic(n=5000, seed=0):
+    # per-type linear trends with heavy-tailed noise, a few planted outliers and missing impacts
+    rng = np.random.default_rng(seed)
+    types = np.array(["Drought", "Flood", "Storm", "Wildfire", "Tsunami"])
+    event_type = rng.choice(types, n)
+    severity = rng.integers(1, 11, n)
+    slope = dict(zip(types, [0.1, 0.25, 0.2, 0.3, 0.15]))
+    log10_impact = np.array([slope[t] for t in event_type]) * severity - 1 + rng.standard_t(4, n) * 0.3
+    log10_impact[rng.choice(n, 40, replace=False)] += rng.choice([-3.0, 3.0], 40)
+    log10_impact[rng.choice(n, 100, replace=False)] = np.nan
+    return pd.DataFrame({
+        "event_id": np.arange(n, dtype=np.int32),
+        "country": "X",
+        "event_type": pd.Categorical(event_type),
+        "year": rng.integers(2020, 2025, n).astype(np.int16),
+        "severity": severity.astype(np.int8),
+        "log10_impact": log10_impact.astype(np.float32),
+    })
+
+
+@pytest.fixture(params=["dataset", "synthetic"])
+def frame(request):
+    return dataset.get_prepared().frame if request.param == "dataset" else _synthetic()
+
+
+def _rows(frame):
+    data = frame[frame["severity"].notna() & frame["log10_impact"].notna()]
+    return data.assign(severity=data["severity"].astype(float), log10_impact=data["log10_impact"].astype(float))
+
+
+def reference_fit(data: pd.DataFrame, by: str) -> pd.DataFrame:
+    return data.groupby(data[by].astype(str))[["severity", "log10_impact"]].apply(
+        lambda g: pd.Series(np.polyfit(g["severity"], g["log10_impact"], 1), index=["slope", "intercept"])
+    )
+
+
+def reference_outliers(data: pd.DataFrame, fit: pd.DataFrame, method: str) -> set:
+    et = data["event_type"].astype(str)
+    resid = data["log10_impact"] - (fit["intercept"].reindex(et).to_numpy()
+                                    + fit["slope"].reindex(et).to_numpy() * data["severity"])
+    flagged = []
+    for _, r in resid.groupby(et):
+        if method == "robust_z":
+            med = r.median()
+            z = 0.6745 * (r - med) / (r - med).abs().median()
+            flagged.append(r.index[z.abs() > ROBUST_Z])
+        else:
+            q1, q3 = r.quantile([0.25, 0.75])
+            iqr = q3 - q1
+            flagged.append(r.index[(r < q1 - IQR_K * iqr) | (r > q3 + IQR_K * iqr)])
+    return set(data.loc[np.concatenate(flagged), "event_id"])
+
+
+@pytest.mark.parametrize("by", TrendSums.BY)
+def test_trends_match_least_squares_per_group(frame, by):
+    fit = TrendSums.from_frame(frame).fit(by)
+    ref = reference_fit(_rows(frame), by)
+    np.testing.assert_allclose(fit[["slope", "intercept"]].loc[ref.index], ref, atol=1e-9)
+    assert (fit["n"].loc[ref.index] == _rows(frame).groupby(_rows(frame)[by].astype(str)).size()).all()
+
+
+@pytest.mark.parametrize("method", ["robust_z", "iqr"])
+def test_outliers_match_a_per_group_reference(frame, method):
+    fit = TrendSums.from_frame(frame).fit("event_type")
+    out = find_outliers(frame, fit, method)
+    assert len(out)
+    assert set(out["event_id"]) == reference_outliers(_rows(frame), fit, method)
+    assert np.all(np.diff(np.abs(out["score"].to_numpy())) <= 0)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+import dataset
+from aggregates import CountCube, RollupCube
+
+
+def test_prepared_dataset_is_held_once():
+    data = dataset.get_prepared()
+    assert dataset.get_prepared() is data
+    assert len(data.frame)
+
+
+def test_views_share_the_frame_until_written():
+    data = dataset.get_prepared()
+    view = data.view()
+    shared = data.frame["economic_impact_million_usd"]
+    assert np.shares_memory(view["economic_impact_million_usd"].to_numpy(), shared.to_numpy())
+
+    before = shared.copy()
+    view["economic_impact_million_usd"] = 0.0
+    view.loc[view.index[:10], "latitude"] = 0.0
+    assert data.frame["economic_impact_million_usd"].equals(before)
+    assert not (data.frame["latitude"].iloc[:10] == 0.0).all()
+
+
+def test_event_dates_survive_the_monthly_key(csv_path):
+    frame = dataset.get_prepared().frame
+    raw = pd.read_csv(csv_path, usecols=["event_id", "date"])
+    raw_dates = pd.to_datetime(raw.set_index(raw["event_id"].str[2:].astype(int))["date"])
+    assert frame["date"].equals(raw_dates.reindex(frame["event_id"]).set_axis(frame.index))
+    assert (frame["month_start"] == frame["date"].dt.to_period("M").dt.start_time).all()
+
+    rows = dataset.month_slice(frame, "2021-03-01", "2021-05-01")
+    assert len(rows) and rows["date"].between("2021-03-01", "2021-05-31").all()
+
+
+def test_load_end_is_the_only_cut(monkeypatch):
+    # the synthetic archive runs to 2025-09, like the real feed
+    monkeypatch.setattr(dataset, "LOAD_END", "2025-09")
+    months = dataset._full_load("to-2025-09").frame["month_start"]
+    assert months.max() == pd.Timestamp("2025-09-01")
+    assert months.min() == pd.Timestamp("2020-01-01")
+
+
+def _with_country(line: bytes, country: bytes) -> bytes:
+    fields = line.split(b",")
+    fields[4] = country
+    return b",".join(fields)
+
+
+def _load(monkeypatch, path, version="full"):
+    monkeypatch.setattr(dataset, "CSV_PATH", path)
+    data = dataset._full_load(version)
+    data.rollup()
+    data.aggregate("temporal_cube", CountCube.from_frame, CountCube.merge)
+    return data
+
+
+def _assert_same_dataset(data, ref):
+    pd.testing.assert_frame_equal(data.frame, ref.frame)
+    keys = RollupCube.KEYS
+    tables = [d.rollup().table.astype({"country": str, "event_type": str}).sort_values(keys) for d in (data, ref)]
+    pd.testing.assert_frame_equal(*(t.reset_index(drop=True) for t in tables), check_dtype=False)
+    np.testing.assert_array_equal(data.aggregate("temporal_cube", None).counts, ref.aggregate("temporal_cube", None).counts)
+
+
+def test_appended_rows_match_a_full_reload(tmp_path, monkeypatch, csv_path):
+    header, *lines = csv_path.read_bytes().splitlines(keepends=True)
+    path = tmp_path / "appends.csv"
+    path.write_bytes(header + b"".join(lines[:2000]))
+    data = _load(monkeypatch, path, "v1")
+
+    # new events, repeats of held and of new ids (the first row wins), a late
+    # event from an old month and half a line still being written
+    repeats = [_with_country(line, b"Nowhere") for line in lines[1990:2000] + lines[2100:2110]]
+    late = lines[10].replace(b"EV00011,", b"EV99999,")
+    partial = lines[2500]
+    appended = b"".join(lines[2000:2500] + repeats + [late])
+    with open(path, "ab") as f:
+        f.write(appended + partial[:25])
+
+    assert data.can_append(path.stat().st_size)
+    data = data.appended("v2")
+    complete = tmp_path / "complete.csv"
+    complete.write_bytes(header + b"".join(lines[:2000]) + appended)
+    monkeypatch.setattr(dataset, "CSV_PATH", path)
+    _assert_same_dataset(data, _load(monkeypatch, complete))
+    assert 99999 in data.frame["event_id"].values
+    assert "Nowhere" not in data.frame["country"].values
+
+    # the rest of the partial line arrives
+    with open(path, "ab") as f:
+        f.write(partial[25:])
+    monkeypatch.setattr(dataset, "CSV_PATH", path)
+    assert data.can_append(path.stat().st_size)
+    data = data.appended("v3")
+    _assert_same_dataset(data, _load(monkeypatch, path))
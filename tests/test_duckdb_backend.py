@@ -0,0 +1,129 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+import dataset  # noqa: E402
+import duckdb_backend  # noqa: E402
+import imports  # noqa: E402
+from aggregates import CountCube, RollupCube, SeveritySummary  # noqa: E402
+from imports import LOAD_END, apply_schema, columnar_store, first_events, fresh_store, in_window  # noqa: E402
+
+
+@pytest.fixture(params=["store", "csv"])
+def source(request, monkeypatch, csv_path):
+    frame = dataset.get_prepared().frame  # the full load writes the store
+    if request.param == "csv":
+        # pretend the store is missing so the engine scans the CSV
+        monkeypatch.setattr(duckdb_backend, "fresh_store", lambda *_: None)
+    else:
+        assert fresh_store(csv_path) is not None
+    return frame
+
+
+def _rollup_table(cube: RollupCube) -> pd.DataFrame:
+    keys = RollupCube.KEYS
+    return cube.table.astype({k: str for k in keys}).sort_values(keys).reset_index(drop=True)
+
+
+def test_count_cube(source):
+    ref, out = CountCube.from_frame(source), duckdb_backend.count_cube()
+    assert out.event_types == ref.event_types
+    np.testing.assert_array_equal(out.years, ref.years)
+    np.testing.assert_array_equal(out.counts, ref.counts)
+
+
+def test_severity_summary(source):
+    ref, out = SeveritySummary.from_frame(source), duckdb_backend.severity_summary()
+    # float32 log10 in both engines: equal up to rounding
+    np.testing.assert_allclose(out.stats.to_numpy(float), ref.stats.to_numpy(float), rtol=1e-5)
+    np.testing.assert_allclose(out.density, ref.density, rtol=1e-5, atol=1e-8)
+
+
+def test_rollup(source):
+    ref, out = _rollup_table(RollupCube.from_frame(source)), _rollup_table(duckdb_backend.rollup())
+    keys = RollupCube.KEYS
+    pd.testing.assert_frame_equal(out[keys], ref[keys], check_dtype=False)
+    np.testing.assert_array_equal(out["events"], ref["events"])
+    np.testing.assert_allclose(out[RollupCube.MEASURES], ref[RollupCube.MEASURES], rtol=1e-5)
+
+
+def _filter_cases(frame):
+    types = frame["event_type"].value_counts().index[:2].tolist()
+    countries = frame["country"].value_counts().index[:3].tolist()
+    months = frame["month_start"]
+    return [
+        {},
+        {"event_types": types},
+        {"event_types": types, "countries": countries},
+        {"severity": (6, 9)},
+        {
+            "event_types": types, "countries": countries, "severity": (3, 10),
+            "start": months.iloc[0], "end": months.iloc[len(months) // 2],
+        },
+    ]
+
+
+def _pandas_filter(frame, event_types=None, countries=None, severity=None, start=None, end=None):
+    mask = frame["has_coords"].to_numpy().copy()
+    if event_types:
+        mask &= frame["event_type"].isin(event_types).to_numpy()
+    if countries:
+        mask &= frame["country"].isin(countries).to_numpy()
+    if severity is not None:
+        mask &= frame["severity"].between(*severity, inclusive="both").to_numpy()
+    if start is not None:
+        mask &= (frame["month_start"] >= start).to_numpy()
+    if end is not None:
+        mask &= (frame["month_start"] <= end).to_numpy()
+    return frame[mask]
+
+
+def test_filter_events(source):
+    for case in _filter_cases(source):
+        ref, out = _pandas_filter(source, **case), duckdb_backend.filter_events(**case)
+        np.testing.assert_array_equal(np.sort(out["event_id"]), np.sort(ref["event_id"]))
+        assert out["month_start"].is_monotonic_increasing
+        assert out["date"].equals(ref.set_index("event_id")["date"].reindex(out["event_id"]).set_axis(out.index))
+
+
+def test_repeated_event_ids_keep_the_first_row(tmp_path, csv_path):
+    raw = pd.read_csv(csv_path)
+    repeats = raw.iloc[:50].assign(country="Nowhere")
+    path = tmp_path / "repeats.csv"
+    pd.concat([raw.iloc[:1000], repeats, raw.iloc[1000:]]).to_csv(path, index=False)
+
+    expected = dataset.prepare_frame(in_window(first_events(apply_schema(pd.read_csv(path))), None, LOAD_END))
+    cube = duckdb_backend.rollup(path)
+    assert cube.table["events"].sum() == len(expected)
+    assert "Nowhere" not in cube.table["country"].astype(str).tolist()
+
+
+def test_a_stale_store_is_hashed_once_and_rebuilt(tmp_path, csv_path, monkeypatch):
+    header, *lines = csv_path.read_bytes().splitlines(keepends=True)
+    path = tmp_path / "grows.csv"
+    path.write_bytes(header + b"".join(lines[:2000]))
+    assert columnar_store(path) is not None
+    with open(path, "ab") as f:
+        f.write(b"".join(lines[2000:]))
+
+    hashed, release = [], threading.Event()
+    sha1, build = imports._file_sha1, imports._build_store
+    monkeypatch.setattr(imports, "_file_sha1", lambda *a: hashed.append(a) or sha1(*a))
+    # hold the background rebuild until the queries ran on the CSV
+    monkeypatch.setattr(imports, "_build_store", lambda *a: release.wait() and build(*a))
+
+    cubes = [duckdb_backend.count_cube(path) for _ in range(3)]
+    assert len(hashed) == 1
+    release.set()
+    duckdb_backend.rebuild_store(path).join()
+    assert fresh_store(path) is not None
+
+    expected = CountCube.from_frame(
+        dataset.prepare_frame(in_window(first_events(apply_schema(pd.read_csv(path))), None, LOAD_END))
+    )
+    for cube in cubes + [duckdb_backend.count_cube(path)]:
+        np.testing.assert_array_equal(cube.counts, expected.counts)
@@ -0,0 +1,63 @@
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import SKETCH_ERROR, SketchCube
+
+QS = np.array([0.25, 0.5, 0.75])
+
+
+def _frame(n=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    severity = rng.integers(1, 6, n)
+    year = rng.integers(2015, 2021, n)
+    event_type = rng.choice(["Earthquake", "Flood", "Storm", "Wildfire"], n)
+    # impacts rounded to cents like the real feed: plenty of ties
+    impact = np.round(rng.lognormal(severity - 3.0, 1.5, n), 2)
+    return pd.DataFrame({
+        "severity": severity,
+        "year": year,
+        "event_type": pd.Categorical(event_type),
+        "log10_impact": np.log10(np.where(impact > 0, impact, np.nan)),
+    })
+
+
+def rank_error(sorted_values: np.ndarray, estimates: np.ndarray) -> float:
+    """Distance of the estimates' rank interval [left, right) to the target quantiles."""
+    n = len(sorted_values)
+    left = np.searchsorted(sorted_values, estimates, side="left") / n
+    right = np.searchsorted(sorted_values, estimates, side="right") / n
+    target = QS * (n - 1) / n
+    return float(np.maximum(np.maximum(left - target, target - right), 0).max())
+
+
+@pytest.mark.parametrize("build", ["once", "incremental"])
+def test_sketch_quartiles_within_the_rank_error(build):
+    frame = _frame()
+    if build == "once":
+        cube = SketchCube.from_frame(frame)
+    else:
+        # merged chunk by chunk like CSV appends and partitioned builds
+        chunks = np.array_split(np.arange(len(frame)), 20)
+        cube = reduce(SketchCube.merge, (SketchCube.from_frame(frame.iloc[c]) for c in chunks))
+
+    data = frame[frame["log10_impact"].notna()]
+    sev, year = data["severity"].to_numpy(), data["year"].to_numpy()
+    etype, val = data["event_type"].astype(str).to_numpy(), data["log10_impact"].to_numpy()
+    selections = [(None, None), ([2016], None), (None, ["Flood"]), ([2015, 2019, 2020], ["Storm", "Wildfire"])]
+
+    worst = 0.0
+    for years, types in selections:
+        keep = np.ones(len(data), dtype=bool)
+        if years is not None:
+            keep &= np.isin(year, years)
+        if types is not None:
+            keep &= np.isin(etype, types)
+        sketches = cube.by_severity(years, types)
+        assert sorted(sketches) == sorted(np.unique(sev[keep]))
+        for s, sketch in sketches.items():
+            exact = np.sort(val[keep & (sev == s)])
+            worst = max(worst, rank_error(exact, sketch.quantiles(QS)))
+    assert worst <= SKETCH_ERROR
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import imports
+from synth import generate
+
+
+@pytest.fixture
+def tricky_csv(tmp_path, monkeypatch):
+    """Chunks of 100 rows that each type differently on their own."""
+    monkeypatch.setattr(imports, "STORE_DIR", tmp_path / "cache")
+    df = generate(1000, seed=1)
+    df.loc[150, "deaths"] = np.nan                    # a gap in one chunk only
+    df.loc[420, "affected_population"] = 2**40        # outside int32 in another
+    df.loc[df.index[:300], "country"] = "Atlantis"    # a category only the first chunks see
+    df.loc[700, "event_id"] = "EV7"                   # an id that doesn't round-trip as an int
+    repeats = df.iloc[[10, 20, 30]].assign(deaths=-1)  # same ids again, later in the file
+    path = tmp_path / "events.csv"
+    pd.concat([df, repeats]).to_csv(path, index=False)
+    return path
+
+
+def _whole_table(path):
+    df = imports.first_events(imports.apply_schema(pd.read_csv(path)))
+    month = df["month"].fillna(0)
+    return df.iloc[np.lexsort((month, df["year"]))].reset_index(drop=True)
+
+
+def test_store_built_in_chunks_matches_the_whole_table(tricky_csv):
+    assert imports._build_store(tricky_csv, chunk_rows=100) is not None
+    stored = imports.read_gc_table(tricky_csv).reset_index(drop=True)
+    pd.testing.assert_frame_equal(stored, _whole_table(tricky_csv))
+
+    # any window of partitions reads back with the same dtypes
+    window = imports.read_gc_table(tricky_csv, "2021-03", "2021-05")
+    assert window["month"].between(3, 5).all() and (window["year"] == 2021).all()
+    # (text ids are a category of the ids read)
+    assert window.dtypes.drop("event_id").equals(stored.dtypes.drop("event_id"))
+
+
+def test_csv_fallback_matches_the_whole_table(tricky_csv, monkeypatch):
+    monkeypatch.setattr(imports, "columnar_store", lambda *_: None)
+    monkeypatch.setattr(imports, "STORE_CHUNK_ROWS", 100)
+    table = imports.read_gc_table(tricky_csv)
+    month = table["month"].fillna(0)
+    table = table.iloc[np.lexsort((month, table["year"]))].reset_index(drop=True)
+    pd.testing.assert_frame_equal(table, _whole_table(tricky_csv))
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+import dataset
+import streaming
+from aggregates import SeveritySummary, spatial_bins, spatial_table
+from imports import CSV_PATH, LOAD_END, read_gc_table
+
+
+def test_streamed_aggregates_match_the_in_memory_build(csv_path):
+    history = streaming.stream_aggregates(csv_path, chunk_rows=250)
+    frame = dataset.prepare_frame(read_gc_table(csv_path, None, LOAD_END))
+    for name in ("temporal_cube", "severity_histogram"):
+        build = streaming.STREAMED[name][0]
+        np.testing.assert_array_equal(history[name].counts, build(frame).counts)
+    rollup = [
+        r.table.astype({"country": str, "event_type": str}).sort_values(["country", "year", "month", "event_type"])
+        for r in (history["rollup"], streaming.STREAMED["rollup"][0](frame))
+    ]
+    np.testing.assert_allclose(rollup[0]["events"], rollup[1]["events"])
+    for by in ("grid", "country"):
+        bins = [
+            b.sort_values(["latitude", "longitude"]).reset_index(drop=True)
+            for b in (spatial_table(history[f"map_bins:{by}"], by),
+                      spatial_bins(frame[frame["has_coords"]], by, streaming.MAP_CELL_DEG))
+        ]
+        pd.testing.assert_frame_equal(*bins, check_dtype=False)
+
+
+def test_streaming_holds_only_recent_months_as_rows(monkeypatch):
+    monkeypatch.setattr(streaming, "FRAME_MONTHS", 6)
+    history = streaming.cached_aggregates(CSV_PATH)
+    start = streaming.frame_start(history)
+    data = dataset._full_load("streamed", start)
+    streaming.attach(data, history)
+
+    months = data.frame["month_start"]
+    assert data.windowed and not dataset.get_prepared().windowed
+    assert months.min() >= pd.Timestamp(start)
+    assert len(np.unique(months)) == 6
+    # the history pages still see every month
+    cube = data.aggregate("temporal_cube", None)
+    assert cube.counts.sum() > len(data.frame)
+    assert cube.counts.sum() == len(dataset.get_prepared().frame)
+
+
+def test_late_rows_refresh_what_is_derived_from_the_history(tmp_path, monkeypatch, csv_path):
+    header, *lines = csv_path.read_bytes().splitlines(keepends=True)
+    path = tmp_path / "late.csv"
+    path.write_bytes(header + b"".join(lines))
+    monkeypatch.setattr(dataset, "CSV_PATH", path)
+    monkeypatch.setattr(streaming, "FRAME_MONTHS", 6)
+    history = streaming.stream_aggregates(path)
+    data = dataset._full_load("v1", streaming.frame_start(history))
+    streaming.attach(data, history)
+
+    def summary(d):
+        hist = d.aggregate("severity_histogram", None)
+        return d.aggregate("severity_summary:histogram", lambda _: SeveritySummary.from_histogram(hist))
+
+    n_before = summary(data).stats["n"].sum()
+    # new events from 2020, long before the frame's months
+    with open(path, "ab") as f:
+        f.write(b"".join(line.replace(b"EV0", b"EV9", 1) for line in lines[:200]))
+    late = data.appended("v2")
+
+    assert late.frame is data.frame
+    hist = late.aggregate("severity_histogram", None)
+    assert hist.counts.sum() > n_before
+    assert summary(late).stats["n"].sum() == hist.counts.sum()